@@ -0,0 +1,139 @@
+# HonkBot | All Rights Reserved
+
+import threading
+import time
+
+import discord
+import numpy as np
+
+from pcm_library import SAMPLE_RATE, CHANNELS
+
+# discord wants 20ms frames
+FRAME_SAMPLES = SAMPLE_RATE // 50 * CHANNELS  # interleaved samples per 20ms frame
+FRAME_BYTES = FRAME_SAMPLES * 2
+SILENCE = b'\x00' * FRAME_BYTES
+
+# how many silent frames to send before pausing the player so discord stops getting packets
+IDLE_FRAMES_BEFORE_PAUSE = 5
+
+
+class MixingBus(discord.AudioSource):
+    """one long-lived source per voice connection that mixes clips into each 20ms frame as they arrive"""
+
+    def __init__(self, gain: float = 0.5):
+        self.gain = gain
+        self.voice_client = None
+        self._lock = threading.Lock()
+        # each clip is [samples, position, samples of delay left before it starts, how many clips
+        # it holds (more than one when the batcher pre-mixed several messages together)]
+        self._clips = []
+        # scratch buffers reused every frame, clips themselves are views into mapped .pcm files
+        self._mix = np.zeros(FRAME_SAMPLES, dtype=np.int32)
+        self._scaled = np.zeros(FRAME_SAMPLES, dtype=np.float32)
+        self._out = np.zeros(FRAME_SAMPLES, dtype=np.int16)
+        self._idle_frames = 0
+        self.frames_read = 0
+        # last time the player pulled a frame, for the stall watchdog
+        self.last_read = time.monotonic()
+        self.clips_enqueued = 0
+        self.clips_started = 0
+
+    def attach(self, voice_client):
+        self.voice_client = voice_client
+
+    @property
+    def pending(self) -> int:
+        """buffers still playing or waiting to start"""
+        return len(self._clips)
+
+    @property
+    def clip_count(self) -> int:
+        """clips still playing or waiting to start, counting each one inside a pre-mixed batch"""
+        return sum(clip[3] for clip in self._clips)
+
+    def enqueue(self, samples: np.ndarray, delay: float = 0.0, clips: int = 1):
+        """mix a buffer (holding `clips` clips) in starting `delay` seconds from now"""
+        self.enqueue_many([(samples, delay, clips)])
+
+    def enqueue_many(self, clips: list):
+        """mix in (samples, delay seconds, clips it holds) buffers, all timed from the same frame"""
+        entries = [[samples, 0, int(delay * SAMPLE_RATE) * CHANNELS, count] for samples, delay, count in clips]
+        with self._lock:
+            self._clips.extend(entries)
+            self.clips_enqueued += len(entries)
+            self._idle_frames = 0
+            # wake the player back up if we went quiet; done under the lock so read() can't pause right after
+            voice_client = self.voice_client
+            if voice_client is not None and voice_client.is_paused():
+                voice_client.resume()
+
+    def take_clips(self) -> list:
+        """hand over every clip mid-play, positions and all, e.g. to a replacement bus"""
+        with self._lock:
+            clips, self._clips = self._clips, []
+            return clips
+
+    def adopt(self, clips: list):
+        """carry on playing clips taken from another bus right where they left off"""
+        if not clips:
+            return
+        with self._lock:
+            self._clips.extend(clips)
+            self._idle_frames = 0
+            voice_client = self.voice_client
+            if voice_client is not None and voice_client.is_paused():
+                voice_client.resume()
+
+    def clear(self) -> int:
+        """cut everything, returns how many clips that was"""
+        with self._lock:
+            dropped = sum(clip[3] for clip in self._clips)
+            self._clips.clear()
+            return dropped
+
+    def read(self) -> bytes:
+        with self._lock:
+            self.frames_read += 1
+            self.last_read = time.monotonic()
+
+            if not self._clips:
+                self._idle_frames += 1
+                if self._idle_frames == IDLE_FRAMES_BEFORE_PAUSE and self.voice_client is not None:
+                    self.voice_client.pause()
+                return SILENCE
+
+            mix = self._mix
+            mix.fill(0)
+            still_playing = []
+
+            for clip in self._clips:
+                samples, pos, delay, _ = clip
+                if delay >= FRAME_SAMPLES:
+                    clip[2] = delay - FRAME_SAMPLES
+                    still_playing.append(clip)
+                    continue
+
+                count = min(FRAME_SAMPLES - delay, len(samples) - pos)
+                if count > 0:
+                    if pos == 0:
+                        self.clips_started += 1
+                    mix[delay:delay + count] += samples[pos:pos + count]
+                    pos += count
+
+                if pos < len(samples):
+                    clip[1] = pos
+                    clip[2] = 0
+                    still_playing.append(clip)
+
+            self._clips = still_playing
+
+        np.multiply(mix, self.gain, out=self._scaled)
+        np.clip(self._scaled, -32768, 32767, out=self._scaled)
+        self._out[:] = self._scaled
+        return self._out.tobytes()
+
+    def is_opus(self) -> bool:
+        return False
+
+    def cleanup(self):
+        self.clear()
@@ -7,12 +7,29 @@ from discord.ext import commands
 import re
 import json
 import os
-from collections import deque
+import asyncio
+import hashlib
+import time
+from collections import defaultdict
 from pathlib import Path
 from dotenv import load_dotenv
-import subprocess
-import tempfile
-from sound_discovery import find_and_download_sound_for_emoji
+from audio_mixer import MixingBus
+from guild_session import sessions, open_session, close_session
+from clip_batcher import ClipBatcher
+from process_budget import media_processes
+from pcm_library import (
+    cached_pcm, get_pcm, build_missing_pcm, invalidate_pcm, clear_pcm_cache, pcm_duration,
+    prefault_pcm, is_mapped, pcm_is_fresh, mount_pack, has_source
+)
+from sound_pack import SoundPack, DEFAULT_PACK_FILE
+from usage_stats import usage
+from sound_index import SoundIndex
+from emoji_keys import SKIN_TONES, canonical_key, custom_emoji_id, lookup_keys
+from sound_discovery import (
+    find_and_download_sound_for_emoji, download_youtube_clip_async, MAX_CLIP_SECONDS,
+    promote_alternate, alternates_left, clear_alternates,
+    load_sound_info, record_sound_info, forget_sound_info, sound_query_for
+)
 
 load_dotenv()
 
@@ -22,20 +39,106 @@ intents.voice_states = True
 
 bot = commands.Bot(command_prefix="honkbot", intents=intents)
 
-audio_queues = {}
-
 EMOJI_CACHE_FILE = 'emoji_cache.json'
 emoji_cache = {}
 
+# a sound pack (see sound_pack.py) to serve in place on startup, if one is there
+SOUND_PACK_FILE = os.getenv('SOUND_PACK', DEFAULT_PACK_FILE)
+
+# emoji -> path for keys served out of the mounted sound pack. never saved: emoji_cache.json only
+# holds what this node discovered or /set itself, `sound_pack.py unpack` is what merges a pack in
+pack_sounds = {}
+
+# emoji -> path for sounds we know are on disk, so the hot path skips the stat calls
+playable_sounds = {}
+
+# sorted + searchable view of every emoji with a sound, for /sounds
+sound_index = SoundIndex()
+
+# custom emoji id -> the cache key its sound lives under, so renames and <a:...> forms share one sound
+custom_emoji_keys = {}
+
 discovering_emojis = set()
 
+# per-file locks so two /set calls for the same emoji (or emojis that sanitize to the same name)
+# don't write the same file. never evicted: a released lock can still have waiters queued
+set_locks = defaultdict(asyncio.Lock)
+
+COMMAND_SYNC_HASH_FILE = '.command_sync_hash'
+
+# how many of the most played sounds to keep mapped and paged in
+HOT_SET_SIZE = 100
+USAGE_FLUSH_INTERVAL = 60.0
+
+# whether clips were already mapped when a message asked for them
+playback_stats = {"warm": 0, "cold": 0}
+
+STARTUP_STARTED = time.perf_counter()
+first_sound_played = False
+
 
 def load_emoji_cache():
     global emoji_cache
     if os.path.exists(EMOJI_CACHE_FILE):
         with open(EMOJI_CACHE_FILE, 'r', encoding='utf-8') as f:
             emoji_cache = json.load(f)
-    print(f"Loaded {len(emoji_cache)} cached emoji mappings")
+    load_sound_pack()
+    load_sound_info()
+    index_emoji_cache()
+    print(f"Loaded {len(emoji_cache)} cached emoji mappings, {len(pack_sounds)} from the pack "
+          f"({len(playable_sounds)} playable)")
+
+
+def load_sound_pack():
+    """mount the sound pack in place; its keys sit under the local cache's, they aren't copied into it"""
+    pack_sounds.clear()
+    if not os.path.exists(SOUND_PACK_FILE):
+        return
+    started = time.perf_counter()
+    try:
+        pack = SoundPack(SOUND_PACK_FILE)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Could not load sound pack {SOUND_PACK_FILE}: {e}")
+        return
+    mounted = mount_pack(pack)
+    migrated = 0
+    for key, entry in pack.entries.items():
+        pack_sounds[key] = entry.path
+        # older builds copied pack keys into emoji_cache.json; hand those back to the pack
+        if emoji_cache.get(key) == entry.path and not os.path.exists(entry.path):
+            del emoji_cache[key]
+            migrated += 1
+    if migrated:
+        save_emoji_cache()
+    added = sum(1 for key in pack_sounds if key not in emoji_cache)
+    print(f"📦 Mounted {mounted} sound(s) from {SOUND_PACK_FILE} ({added} new key(s), "
+          f"pcm {'included' if pack.has_pcm else 'decoded on demand'}) in {time.perf_counter() - started:.2f}s")
+
+
+def known_sounds():
+    """every emoji -> path we have, the local cache winning over the pack"""
+    return {**pack_sounds, **emoji_cache}
+
+
+def known_sound(key):
+    """the path cached for a key, locally or in the pack (None for a failed discovery or no entry)"""
+    if key in emoji_cache:
+        return emoji_cache[key]
+    return pack_sounds.get(key)
+
+
+def index_emoji_cache():
+    """rebuild the emoji -> playable path index and the /sounds index from the cache and the pack"""
+    playable_sounds.clear()
+    custom_emoji_keys.clear()
+    sounds = known_sounds()
+    for emoji, path in sounds.items():
+        if path and has_source(path):
+            playable_sounds[emoji] = path
+        custom_id = custom_emoji_id(emoji)
+        if custom_id:
+            custom_emoji_keys[custom_id] = emoji
+    sound_index.rebuild((emoji, path, sound_query_for(path)) for emoji, path in sounds.items() if path)
 
 
 def save_emoji_cache():
@@ -43,6 +146,125 @@ def save_emoji_cache():
         json.dump(emoji_cache, f, indent=2, ensure_ascii=False)
 
 
+def cache_emoji_sound(emoji, sound_path):
+    """remember a sound (or None for a failed discovery) and keep the index in sync"""
+    emoji_cache[emoji] = sound_path
+    custom_id = custom_emoji_id(emoji)
+    if custom_id:
+        custom_emoji_keys[custom_id] = emoji
+    if sound_path:
+        invalidate_pcm(sound_path)
+        sound_index.set(emoji, sound_path, sound_query_for(sound_path))
+    else:
+        sound_index.remove(emoji)
+    if sound_path and os.path.exists(sound_path):
+        playable_sounds[emoji] = sound_path
+        prebuild_pcm(sound_path)
+    else:
+        playable_sounds.pop(emoji, None)
+    save_emoji_cache()
+
+
+def forget_emoji_sound(emoji):
+    """drop an emoji from the cache (and the pack, until the next restart) and the index"""
+    old_path = known_sound(emoji)
+    emoji_cache.pop(emoji, None)
+    pack_sounds.pop(emoji, None)
+    playable_sounds.pop(emoji, None)
+    sound_index.remove(emoji)
+    custom_id = custom_emoji_id(emoji)
+    if custom_id and custom_emoji_keys.get(custom_id) == emoji:
+        del custom_emoji_keys[custom_id]
+    if old_path and not os.path.exists(old_path):
+        invalidate_pcm(old_path, delete=True)
+        forget_sound_info(old_path)
+    elif old_path:
+        invalidate_pcm(old_path)
+    save_emoji_cache()
+    return old_path
+
+
+def hot_sound_paths():
+    """playable paths for the most played sounds, hottest first"""
+    paths = []
+    for key, _, _ in usage.hot_set(HOT_SET_SIZE):
+        sound_path = get_sound_for_emoji(key)
+        if sound_path and sound_path not in paths:
+            paths.append(sound_path)
+    return paths
+
+
+def prefault_sounds(sound_paths):
+    warmed = 0
+    for sound_path in sound_paths:
+        try:
+            prefault_pcm(sound_path)
+            warmed += 1
+        except Exception as e:
+            print(f"Error warming {sound_path}: {e}")
+    return warmed
+
+
+async def warm_sound_cache():
+    """map (building if needed) the hot set's pcm in the background; cold sounds stay lazy"""
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    cold = [p for p in hot_sound_paths() if not is_mapped(p)]
+    if not cold:
+        return
+    warmed = await loop.run_in_executor(None, prefault_sounds, cold)
+    print(f"🔥 Warmed {warmed} hot sound(s) in {time.perf_counter() - started:.2f}s")
+
+
+async def usage_loop():
+    """flush play counts to disk and keep the hot set warm as it shifts"""
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(USAGE_FLUSH_INTERVAL)
+        try:
+            await loop.run_in_executor(None, usage.flush)
+            await warm_sound_cache()
+        except Exception as e:
+            print(f"Usage flush error: {e}")
+
+
+def prebuild_pcm(sound_path):
+    """decode a newly cached sound into the pcm library off the event loop"""
+    asyncio.get_running_loop().run_in_executor(None, build_missing_pcm, [sound_path])
+
+
+def command_tree_hash():
+    """stable hash of the slash command payload we would upload"""
+    payload = [cmd.to_dict(bot.tree) for cmd in bot.tree.get_commands()]
+    payload.sort(key=lambda c: c.get('name', ''))
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+async def sync_commands_if_changed():
+    """only hit discord's sync endpoint when the command tree actually changed"""
+    tree_hash = command_tree_hash()
+
+    last_hash = None
+    if os.path.exists(COMMAND_SYNC_HASH_FILE):
+        with open(COMMAND_SYNC_HASH_FILE, 'r', encoding='utf-8') as f:
+            last_hash = f.read().strip()
+
+    if tree_hash == last_hash:
+        print("Slash commands unchanged, skipping sync")
+        return
+
+    try:
+        synced = await bot.tree.sync()
+        print(f"Synced {len(synced)} slash command(s)")
+    except Exception as e:
+        print(f"Failed to sync commands: {e}")
+        return
+
+    with open(COMMAND_SYNC_HASH_FILE, 'w', encoding='utf-8') as f:
+        f.write(tree_hash)
+
+
 UNICODE_EMOJI_PATTERN = re.compile(
     r'[\U0001F600-\U0001F64F'  # Emoticons
     r'\U0001F300-\U0001F5FF'  # Symbols & Pictographs
@@ -73,8 +295,8 @@ def extract_emojis(message_content):
     """extract all emojis from a message in exact order of appearance, preserving ZWJ sequences"""
     emojis = []
 
-    unicode_positions = [(m.start(), m.group()) for m in UNICODE_EMOJI_PATTERN.finditer(message_content)]
-    custom_positions = [(m.start(), m.group()) for m in CUSTOM_EMOJI_PATTERN.finditer(message_content)]
+    unicode_positions = [(m.start(), m.end(), m.group()) for m in UNICODE_EMOJI_PATTERN.finditer(message_content)]
+    custom_positions = [(m.start(), m.end(), m.group()) for m in CUSTOM_EMOJI_PATTERN.finditer(message_content)]
 
     all_emojis = unicode_positions + custom_positions
     all_emojis.sort(key=lambda x: x[0])
@@ -83,16 +305,20 @@ def extract_emojis(message_content):
 
     combined_emojis = []
     skip_until = -1
-    for i, (pos, emoji) in enumerate(all_emojis):
+    for i, (pos, end, emoji) in enumerate(all_emojis):
         if i < skip_until:
             continue
-        # glue zwj-linked emoji parts into a single emoji
+        # glue zwj-linked parts and skin tone modifiers onto the emoji they belong to
         combined = emoji
         j = i + 1
-        while j < len(all_emojis):
-            segment = message_content[pos:all_emojis[j][0]]
-            if '\u200D' in segment:
-                combined += segment + all_emojis[j][1]
+        while j < len(all_emojis) and not emoji.startswith('<'):
+            next_pos, next_end, next_emoji = all_emojis[j]
+            segment = message_content[end:next_pos]
+            if any(c not in VARIATION_SELECTORS for c in segment):
+                break
+            if '\u200D' in segment or (not segment and (next_emoji in SKIN_TONES or set(next_emoji) <= VARIATION_SELECTORS)):
+                combined += segment + next_emoji
+                end = next_end
                 j += 1
             else:
                 break
@@ -105,16 +331,35 @@ def extract_emojis(message_content):
     return combined_emojis
 
 
+def sound_key_for(emoji):
+    """the one cache key an emoji's sound is stored (and discovered) under"""
+    custom_id = custom_emoji_id(emoji)
+    if custom_id:
+        return custom_emoji_keys.get(custom_id) or canonical_key(emoji)
+    # older caches have entries under exact variants, keep honoring those
+    if emoji in emoji_cache or emoji in pack_sounds:
+        return emoji
+    return canonical_key(emoji)
+
+
+def needs_discovery(emoji):
+    """true if nobody has tried (or is trying) to find a sound for this emoji's key yet"""
+    key = sound_key_for(emoji)
+    return key not in emoji_cache and key not in pack_sounds and key not in discovering_emojis
+
+
 async def discover_sound_for_emoji(emoji: str) -> str:
     """figure out a sound for a new emoji and download it"""
+    key = sound_key_for(emoji)
+
     # Avoid duplicate discoveries
-    if emoji in discovering_emojis:
+    if key in discovering_emojis:
         return None
 
-    discovering_emojis.add(emoji)
+    discovering_emojis.add(key)
 
     try:
-        print(f"🔍 Discovering sound for new emoji: {emoji}")
+        print(f"🔍 Discovering sound for new emoji: {key}")
 
         emoji_name = None
         if emoji.startswith('<'):
@@ -123,248 +368,264 @@ async def discover_sound_for_emoji(emoji: str) -> str:
                 print(f"   Custom emoji detected: '{emoji_name}'")
 
         # use LLM to find and download sound (now with extra async!)
-        sound_path = await find_and_download_sound_for_emoji(emoji, emoji_name)
+        sound_path = await find_and_download_sound_for_emoji(key, emoji_name)
 
         if sound_path and os.path.exists(sound_path):
-            emoji_cache[emoji] = sound_path
-            save_emoji_cache()
-            print(f"✅ Cached new sound: {emoji} -> {sound_path}")
+            cache_emoji_sound(key, sound_path)
+            print(f"✅ Cached new sound: {key} -> {sound_path}")
             return sound_path
         else:
-            print(f"❌ Failed to discover sound for: {emoji}")
-            emoji_cache[emoji] = None
-            save_emoji_cache()
+            print(f"❌ Failed to discover sound for: {key}")
+            cache_emoji_sound(key, None)
             return None
 
     except Exception as e:
-        print(f"Error discovering sound for {emoji}: {e}")
+        print(f"Error discovering sound for {key}: {e}")
         return None
     finally:
-        discovering_emojis.discard(emoji)
+        discovering_emojis.discard(key)
 
 
 def get_sound_for_emoji(emoji):
-    """check cache or mark for discovery"""
-    if emoji in emoji_cache:
-        cached_path = emoji_cache[emoji]
-        # Verify file still exists
-        if cached_path and os.path.exists(cached_path):
-            return cached_path
-        elif cached_path is None:
-            return None
+    """check cache, falling back through the emoji's canonical forms (👍🏽 -> 👍, 👩‍💻 -> 👩 / 💻)"""
+    sound_path = playable_sounds.get(emoji)
+    if sound_path:
+        return sound_path
+
+    custom_id = custom_emoji_id(emoji)
+    if custom_id:
+        key = custom_emoji_keys.get(custom_id)
+        return playable_sounds.get(key) if key else None
 
+    for key in lookup_keys(emoji):
+        sound_path = playable_sounds.get(key)
+        if sound_path:
+            return sound_path
     return None
 
 
-async def play_next_sound(guild_id):
-    """play next thing in the queue, mixes overlapping sounds"""
-    if guild_id not in audio_queues or not audio_queues[guild_id]:
-        return
+# little overlap between clips from the same message
+OVERLAP_PERCENTAGE = 0.20
 
-    voice_client = discord.utils.get(bot.voice_clients, guild__id=guild_id)
 
-    if not voice_client or not voice_client.is_connected():
-        audio_queues[guild_id].clear()
-        return
+def get_mixing_bus(session, restart: bool = False):
+    """the guild's live mixing bus, (re)starting it on the voice client if it isn't running"""
+    voice_client = session.voice_client
+    old = session.bus
 
-    if voice_client.is_playing():
-        return
+    if not restart and old is not None and voice_client.source is old and (voice_client.is_playing() or voice_client.is_paused()):
+        return old
 
-    # pull a few sound files to mix
-    sounds_to_mix = []
-    max_sounds = min(10, len(audio_queues[guild_id]))
+    bus = MixingBus()
+    bus.attach(voice_client)
+    session.bus = bus
 
-    for _ in range(max_sounds):
-        if audio_queues[guild_id]:
-            sound_path = audio_queues[guild_id].popleft()
-            if os.path.exists(sound_path):
-                sounds_to_mix.append(sound_path)
+    if voice_client.is_playing() or voice_client.is_paused():
+        voice_client.stop()
 
-    if not sounds_to_mix:
-        return
+    def after_playing(error):
+        if error:
+            print(f"Error playing audio: {error}")
 
-    # if it’s just one sound just play it raw
-    if len(sounds_to_mix) == 1:
-        audio_source = discord.FFmpegPCMAudio(
-            sounds_to_mix[0],
-            options='-vn -filter:a "volume=0.5"'
-        )
+    voice_client.play(bus, after=after_playing)
+    # whatever the old bus was still playing picks up on the new one instead of getting cut
+    if old is not None:
+        bus.adopt(old.take_clips())
+    return bus
 
-        def after_playing(error):
-            if error:
-                print(f"Error playing audio: {error}")
-            bot.loop.create_task(play_next_sound(guild_id))
 
-        voice_client.play(audio_source, after=after_playing)
+def play_batch(session, batch):
+    """hand a batch of (samples, delay, clips) buffers to the guild's bus"""
+    if not session.is_connected():
         return
+    get_mixing_bus(session).enqueue_many(batch)
+    note_sound_started()
 
-    def get_duration(sound_path):
-        try:
-            result = subprocess.run(
-                ['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
-                 '-of', 'default=noprint_wrappers=1:nokey=1', sound_path],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            return float(result.stdout.strip())
-        except:
-            return 1.0
 
-    durations = [get_duration(sound) for sound in sounds_to_mix]
+def get_batcher(session):
+    batcher = session.batcher
+    if batcher is None:
+        batcher = session.batcher = ClipBatcher(lambda batch: play_batch(session, batch), lambda: session.depth)
+    return batcher
 
-    # little overlap between clips
-    OVERLAP_PERCENTAGE = 0.20
 
-    # calculate delays for each bit
-    delays = [0.0]
-    cumulative_time = 0.0
+async def queue_sounds(session, sound_paths):
+    """decode clips and batch them into the guild's next render, staggered like one message's worth of sounds"""
+    loop = asyncio.get_running_loop()
 
-    for i in range(len(durations) - 1):
-        overlap_duration = durations[i] * OVERLAP_PERCENTAGE
-        cumulative_time += durations[i] - overlap_duration
-        delays.append(cumulative_time)
+    clips = []
+    for sound_path in sound_paths:
+        samples = cached_pcm(sound_path)
+        if samples is not None:
+            playback_stats["warm"] += 1
+        else:
+            playback_stats["cold"] += 1
+            try:
+                samples = await loop.run_in_executor(None, get_pcm, sound_path)
+            except Exception as e:
+                print(f"Error decoding {sound_path}: {e}")
+                continue
+        clips.append(samples)
 
-    # build ffmpeg command filters for overlap
-    filter_parts = []
+    if not clips or not session.is_connected():
+        return 0
 
-    for i, (sound, delay) in enumerate(zip(sounds_to_mix, delays)):
-        delay_ms = int(delay * 1000)
-        if delay_ms > 0:
-            filter_parts.append(f"[{i}:a]adelay={delay_ms}|{delay_ms},volume=0.5[a{i}]")
-        else:
-            filter_parts.append(f"[{i}:a]volume=0.5[a{i}]")
+    staggered = []
+    delay = 0.0
+    for samples in clips:
+        staggered.append((samples, delay))
+        duration = pcm_duration(samples)
+        delay += duration - duration * OVERLAP_PERCENTAGE
 
-    # mix delayed audio tracks together
-    mix_inputs = ''.join(f"[a{i}]" for i in range(len(sounds_to_mix)))
-    filter_complex = ';'.join(
-        filter_parts) + f";{mix_inputs}amix=inputs={len(sounds_to_mix)}:duration=longest:dropout_transition=0[out]"
+    get_batcher(session).submit(staggered)
+    session.clips_queued += len(clips)
+    return len(clips)
 
-    # temp output spot
-    with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as tmp:
-        tmp_path = tmp.name
 
-    try:
-        # build the ffmpeg run
-        cmd = ['ffmpeg', '-y']
-        for sound in sounds_to_mix:
-            cmd.extend(['-i', sound])
-        cmd.extend([
-            '-filter_complex', filter_complex,
-            '-map', '[out]',
-            '-ar', '48000',
-            '-ac', '2',
-            tmp_path
-        ])
-
-        result = subprocess.run(cmd, capture_output=True, timeout=30)
-
-        if result.returncode != 0:
-            print(f"FFmpeg error: {result.stderr.decode()}")
-            os.remove(tmp_path)
-            await play_next_sound(guild_id)
-            return
+# a bus with clips waiting that hasn't been read for this long means the player thread died or wedged
+PLAYER_STALL_SECONDS = 5.0
+WATCHDOG_INTERVAL = 5.0
 
-    except Exception as e:
-        print(f"Error mixing audio: {e}")
-        if os.path.exists(tmp_path):
-            os.remove(tmp_path)
-        await play_next_sound(guild_id)
-        return
 
-    # play the finished audio clip
-    audio_source = discord.FFmpegPCMAudio(tmp_path, options='-vn')
+def restart_stalled_players():
+    """swap in a fresh bus for any guild whose player stopped pulling frames"""
+    now = time.monotonic()
+    for guild_id, session in list(sessions.items()):
+        bus = session.bus
+        voice_client = session.voice_client
+        if bus is None or not session.is_connected():
+            continue
+        if not bus.pending or voice_client.is_paused():
+            continue
 
-    def after_playing(error):
+        player_gone = voice_client.source is not bus or not voice_client.is_playing()
+        if player_gone or now - bus.last_read > PLAYER_STALL_SECONDS:
+            print(f"🩺 Restarting stalled player in guild {guild_id} ({bus.clip_count} clip(s) carried over)")
+            get_mixing_bus(session, restart=True)
+
+
+async def watchdog_loop():
+    """reap hung ffmpeg children and restart stalled guild players"""
+    loop = asyncio.get_running_loop()
+    last_queued = 0
+    while True:
+        await asyncio.sleep(WATCHDOG_INTERVAL)
         try:
-            os.remove(tmp_path)
-        except:
-            pass
+            await loop.run_in_executor(None, media_processes.reap_hung)
+            restart_stalled_players()
+
+            stats = media_processes.stats()
+            if stats["queued"] > last_queued:
+                print(f"⏳ Media process budget under pressure: {stats}")
+            last_queued = stats["queued"]
+        except Exception as e:
+            print(f"Watchdog error: {e}")
 
-        if error:
-            print(f"Error playing audio: {error}")
 
-        bot.loop.create_task(play_next_sound(guild_id))
+def note_sound_started():
+    """log how long it took from process start to the first sound going out"""
+    global first_sound_played
+    if not first_sound_played:
+        first_sound_played = True
+        print(f"⏱️ First sound playing {time.perf_counter() - STARTUP_STARTED:.2f}s after startup")
 
-    voice_client.play(audio_source, after=after_playing)
+
+@bot.event
+async def setup_hook():
+    """runs once after login, before the gateway connects (not on reconnects)"""
+    load_emoji_cache()
+    usage.load()
+    await sync_commands_if_changed()
+    bot.loop.create_task(warm_sound_cache())
+    bot.loop.create_task(watchdog_loop())
+    bot.loop.create_task(usage_loop())
 
 
 @bot.event
 async def on_ready():
-    """when bot first connects"""
+    """fires on first connect and again on every gateway reconnect, so keep it cheap"""
     print(f'{bot.user} has connected to Discord!')
     print(f'Bot is in {len(bot.guilds)} guilds')
+    print(f"⏱️ Ready {time.perf_counter() - STARTUP_STARTED:.2f}s after startup")
 
-    load_emoji_cache()
 
-    try:
-        synced = await bot.tree.sync()
-        print(f"Synced {len(synced)} slash command(s)")
-    except Exception as e:
-        print(f"Failed to sync commands: {e}")
+@bot.event
+async def on_voice_state_update(member, before, after):
+    """keep guild sessions in step with where the bot itself is connected"""
+    if bot.user is None or member.id != bot.user.id:
+        return
+
+    if after.channel is None:
+        if close_session(member.guild.id) is not None:
+            print(f"🔇 Left voice in {member.guild.name}")
+        return
+
+    voice_client = member.guild.voice_client
+    if voice_client is not None:
+        open_session(voice_client, after.channel.id)
 
 
 @bot.event
 async def on_message(message):
     """watch messages and add sounds to queue"""
-    if message.author.bot:
+    if message.author.bot or message.guild is None:
         return
 
-    emojis = extract_emojis(message.content)
-
-    if not emojis:
+    # most messages come from guilds we're not in voice in, so bail before touching the content
+    session = sessions.get(message.guild.id)
+    if session is None:
         return
 
-    if not message.author.voice or not message.author.voice.channel:
+    voice = message.author.voice
+    if not voice or not voice.channel or voice.channel.id != session.channel_id:
         return
 
-    user_voice_channel = message.author.voice.channel
-    guild_id = message.guild.id
-
-    voice_client = discord.utils.get(bot.voice_clients, guild=message.guild)
+    emojis = extract_emojis(message.content)
 
-    if not voice_client or not voice_client.is_connected():
+    if not emojis:
         return
 
-    if voice_client.channel != user_voice_channel:
+    if not session.is_connected():
         return
 
-    if guild_id not in audio_queues:
-        audio_queues[guild_id] = deque()
+    guild_id = session.guild_id
+    session.messages += 1
 
-    sounds_added = 0
+    known_paths = []
     unknown_emojis = []
+    unknown_keys = set()
 
     for emoji in emojis:
         sound_path = get_sound_for_emoji(emoji)
         if sound_path:
-            audio_queues[guild_id].append(sound_path)
-            sounds_added += 1
-        elif emoji not in discovering_emojis and emoji not in emoji_cache:
+            known_paths.append(sound_path)
+            usage.record(guild_id, sound_key_for(emoji))
+        elif needs_discovery(emoji) and sound_key_for(emoji) not in unknown_keys:
             # brand new emoji, gotta handle it
             unknown_emojis.append(emoji)
+            unknown_keys.add(sound_key_for(emoji))
 
             if emoji.startswith('<'):
                 name = extract_custom_emoji_name(emoji)
                 if name:
                     print(f"📝 New custom emoji detected: {name} ({emoji})")
 
+    # known sounds go out right away, discoveries get mixed in whenever they land
+    if known_paths:
+        await queue_sounds(session, known_paths)
+
     if unknown_emojis:
         discovered_paths = []
 
         for emoji in unknown_emojis:
             path = await discover_sound_for_emoji(emoji)
-            if path:
-                discovered_paths.append(path)
-
-        for path in discovered_paths:
             if path and os.path.exists(path):
-                audio_queues[guild_id].append(path)
-                sounds_added += 1
+                discovered_paths.append(path)
+                usage.record(guild_id, sound_key_for(emoji))
+                session.discoveries += 1
 
-    # now actually play them all
-    if sounds_added > 0 and not voice_client.is_playing():
-        await play_next_sound(guild_id)
+        if discovered_paths:
+            await queue_sounds(session, discovered_paths)
 
 
 @bot.tree.command(name="join", description="Make the bot join your voice channel")
@@ -378,7 +639,7 @@ async def join(interaction: discord.Interaction):
         return
 
     user_voice_channel = interaction.user.voice.channel
-    voice_client = discord.utils.get(bot.voice_clients, guild=interaction.guild)
+    voice_client = interaction.guild.voice_client
 
     if voice_client and voice_client.is_connected():
         if voice_client.channel == user_voice_channel:
@@ -390,6 +651,7 @@ async def join(interaction: discord.Interaction):
         else:
             try:
                 await voice_client.move_to(user_voice_channel)
+                open_session(voice_client, user_voice_channel.id)
                 await interaction.response.send_message(
                     f"🔊 On My Way! to {user_voice_channel.name}!",
                     ephemeral=True
@@ -401,7 +663,8 @@ async def join(interaction: discord.Interaction):
                 )
     else:
         try:
-            await user_voice_channel.connect()
+            voice_client = await user_voice_channel.connect()
+            open_session(voice_client, user_voice_channel.id)
             await interaction.response.send_message(
                 f"🔊 in {user_voice_channel.name} now fr fr",
                 ephemeral=True
@@ -416,12 +679,10 @@ async def join(interaction: discord.Interaction):
 @bot.tree.command(name="leave", description="Make the bot leave the voice channel")
 async def leave(interaction: discord.Interaction):
     """bot leaves vc"""
-    voice_client = discord.utils.get(bot.voice_clients, guild=interaction.guild)
+    voice_client = interaction.guild.voice_client
 
     if voice_client and voice_client.is_connected():
-        if interaction.guild.id in audio_queues:
-            audio_queues[interaction.guild.id].clear()
-
+        close_session(interaction.guild.id)
         await voice_client.disconnect()
         await interaction.response.send_message("👋 adieu", ephemeral=True)
     else:
@@ -431,72 +692,142 @@ async def leave(interaction: discord.Interaction):
 @bot.tree.command(name="skip", description="Skip all sounds and clear the queue")
 async def skip(interaction: discord.Interaction):
     """stop everything and empty the queue"""
-    voice_client = discord.utils.get(bot.voice_clients, guild=interaction.guild)
-    guild_id = interaction.guild.id
+    session = sessions.get(interaction.guild.id)
 
-    if guild_id in audio_queues:
-        queue_size = len(audio_queues[guild_id])
-        audio_queues[guild_id].clear()
-    else:
-        queue_size = 0
+    # clearing the bus cuts everything mid-frame, the bus itself keeps running
+    queue_size = session.skip() if session is not None else 0
 
-    if voice_client and voice_client.is_playing():
-        voice_client.stop()
+    if queue_size > 0:
         await interaction.response.send_message(
-            f"⏭️ thank god, {queue_size} sound(s) cleared from queue.",
+            f"⏭️ thank god, {queue_size} clip(s) cleared from queue.",
             ephemeral=True
         )
     else:
-        if queue_size > 0:
-            await interaction.response.send_message(
-                f"🗑️ removed {queue_size} awful sound(s) from queue.",
-                ephemeral=True
-            )
-        else:
-            await interaction.response.send_message(
-                "there's nothing playing rn?",
-                ephemeral=True
-            )
+        await interaction.response.send_message(
+            "there's nothing playing rn?",
+            ephemeral=True
+        )
 
 
-@bot.tree.command(name="sounds", description="Show all available emoji sounds")
-async def sounds(interaction: discord.Interaction):
-    """show what emojis have sounds"""
-    total_sounds = len([v for v in emoji_cache.values() if v is not None])
+SOUNDS_PER_PAGE = 20
+SEARCH_RESULT_LIMIT = 500
 
-    embed = discord.Embed(
-        title="🔊 Available Emoji Sounds",
-        description=f"Using /join first, then type messages with emojis to play sounds!\n\n**{total_sounds}** sounds available (and growing!)",
-        color=discord.Color.blue()
-    )
 
-    if emoji_cache:
-        cached_emojis = [k for k, v in emoji_cache.items() if v is not None][:20]
-        if cached_emojis:
-            cached_list = " ".join(cached_emojis)
-            embed.add_field(name="Discovered Emojis (sample)", value=cached_list, inline=False)
+def describe_sound(entry):
+    line = entry.key
+    if entry.name:
+        line += f" `{entry.name}`"
+    if entry.query:
+        query = entry.query if len(entry.query) <= 60 else entry.query[:57] + "..."
+        line += f" — {query}"
+    return line
 
-    embed.add_field(
-        name="How to use",
-        value="1. Use `/join` to add me to your voice channel\n2. Type messages with emojis\n3. New emojis are automatically discovered and downloaded!\n4. Sounds are cached for instant replay",
-        inline=False
-    )
 
-    await interaction.response.send_message(embed=embed, ephemeral=True)
+class SoundBrowser(discord.ui.View):
+    """prev/next paging over the whole library, or over one search's results"""
+
+    def __init__(self, owner_id: int, results: list = None, search: str = None):
+        super().__init__(timeout=300)
+        self.owner_id = owner_id
+        # None means page straight off the live index
+        self.results = results
+        self.search = search
+        self.page = 0
+        self.sync_buttons()
+
+    def page_count(self) -> int:
+        if self.results is None:
+            return sound_index.page_count(SOUNDS_PER_PAGE)
+        return max(1, -(-len(self.results) // SOUNDS_PER_PAGE))
+
+    def entries(self) -> list:
+        if self.results is None:
+            return sound_index.page(self.page, SOUNDS_PER_PAGE)
+        start = self.page * SOUNDS_PER_PAGE
+        return self.results[start:start + SOUNDS_PER_PAGE]
+
+    def embed(self) -> discord.Embed:
+        if self.results is None:
+            header = (f"Using /join first, then type messages with emojis to play sounds!\n\n"
+                      f"**{len(sound_index)}** sounds available (and growing!)")
+        else:
+            shown = f"first {len(self.results)}" if len(self.results) >= SEARCH_RESULT_LIMIT else str(len(self.results))
+            header = f"**{shown}** sound(s) matching `{self.search}`"
+
+        lines = [describe_sound(entry) for entry in self.entries()]
+        embed = discord.Embed(
+            title="🔊 Available Emoji Sounds",
+            description=header + ("\n\n" + "\n".join(lines) if lines else ""),
+            color=discord.Color.blue()
+        )
+
+        if self.results is None and self.page == 0:
+            embed.add_field(
+                name="How to use",
+                value="1. Use `/join` to add me to your voice channel\n2. Type messages with emojis\n3. New emojis are automatically discovered and downloaded!\n4. Sounds are cached for instant replay",
+                inline=False
+            )
+
+        embed.set_footer(text=f"Page {self.page + 1}/{self.page_count()}")
+        return embed
+
+    def sync_buttons(self):
+        self.previous_page.disabled = self.page <= 0
+        self.next_page.disabled = self.page >= self.page_count() - 1
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.owner_id
+
+    async def show(self, interaction: discord.Interaction):
+        # the library can shrink while someone's browsing
+        self.page = max(0, min(self.page, self.page_count() - 1))
+        self.sync_buttons()
+        await interaction.response.edit_message(embed=self.embed(), view=self)
+
+    @discord.ui.button(label="◀ Prev", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page -= 1
+        await self.show(interaction)
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page += 1
+        await self.show(interaction)
+
+
+@bot.tree.command(name="sounds", description="Browse or search all available emoji sounds")
+@app_commands.describe(search="Custom emoji name or what the sound is (e.g. 'quack')")
+async def sounds(interaction: discord.Interaction, search: str = None):
+    """page through what emojis have sounds, optionally filtered"""
+    if search:
+        results = sound_index.search(search, limit=SEARCH_RESULT_LIMIT)
+        if not results:
+            await interaction.response.send_message(f"no sounds matching `{search}` :(", ephemeral=True)
+            return
+        browser = SoundBrowser(interaction.user.id, results, search)
+    else:
+        browser = SoundBrowser(interaction.user.id)
+
+    await interaction.response.send_message(embed=browser.embed(), view=browser, ephemeral=True)
 
 
 @bot.tree.command(name="queue", description="Show current sound queue")
 async def queue(interaction: discord.Interaction):
     """show what’s waiting to play"""
-    guild_id = interaction.guild.id
+    session = sessions.get(interaction.guild.id)
+
+    batcher = session.batcher if session is not None else None
+    waiting = batcher.pending if batcher is not None else 0
 
-    if guild_id not in audio_queues or not audio_queues[guild_id]:
+    if session is None or not (session.depth or waiting):
         await interaction.response.send_message("Queue is empty!", ephemeral=True)
         return
 
-    queue_size = len(audio_queues[guild_id])
+    # clips from messages that landed together get mixed into one buffer before they hit the bus
+    per_render = batcher.clips_rendered / batcher.renders if batcher is not None and batcher.renders else 1.0
     await interaction.response.send_message(
-        f"🎵 **{queue_size}** sound(s) in queue",
+        f"🎵 **{session.clips_playing}** clip(s) playing, {waiting} about to join them "
+        f"({session.player_state}, {session.clips_queued} clip(s) this session, {per_render:.1f} per mix)",
         ephemeral=True
     )
 
@@ -512,10 +843,10 @@ async def discover(interaction: discord.Interaction, emoji: str):
         await interaction.followup.send("❌ No valid emoji found!", ephemeral=True)
         return
 
-    target_emoji = emojis[0]
+    target_emoji = sound_key_for(emojis[0])
 
-    if target_emoji in emoji_cache and emoji_cache[target_emoji]:
-        existing_path = emoji_cache[target_emoji]
+    existing_path = known_sound(target_emoji)
+    if existing_path:
 
         display_name = ""
         if target_emoji.startswith('<'):
@@ -559,18 +890,33 @@ async def redo(interaction: discord.Interaction, emoji: str, suggestion: str = N
         await interaction.followup.send("❌ No valid emoji found!", ephemeral=True)
         return
 
-    target_emoji = emojis[0]
+    target_emoji = sound_key_for(emojis[0])
+
+    # no suggestion means "just give me something else", so try the prefetched candidates first
+    old_path = known_sound(target_emoji)
+    if not suggestion and old_path and os.path.exists(old_path):
+        swapped_path = promote_alternate(old_path)
+        if swapped_path:
+            invalidate_pcm(swapped_path, delete=True)
+            cache_emoji_sound(target_emoji, swapped_path)
+            print(f"🔁 Swapped {target_emoji} to its next prefetched candidate")
+            await interaction.followup.send(
+                f"✅ Swapped {target_emoji} to the next candidate ({alternates_left(swapped_path)} more left)"
+                f"\nPath: `{swapped_path}`",
+                ephemeral=True
+            )
+            return
 
-    if target_emoji in emoji_cache:
-        old_path = emoji_cache.get(target_emoji)
+    if target_emoji in emoji_cache or target_emoji in pack_sounds:
+        if old_path:
+            clear_alternates(old_path)
         if old_path and os.path.exists(old_path):
             try:
                 os.remove(old_path)
                 await interaction.followup.send(f"🗑️ removed old sound for {target_emoji}", ephemeral=True)
             except Exception as e:
                 await interaction.followup.send(f"⚠️ couldn't delete old file ({e})", ephemeral=True)
-        emoji_cache.pop(target_emoji, None)
-        save_emoji_cache()
+        forget_emoji_sound(target_emoji)
 
     # tell LLM that previous choice was bad, include user idea if given
     if suggestion:
@@ -589,8 +935,7 @@ async def redo(interaction: discord.Interaction, emoji: str, suggestion: str = N
     )
 
     if new_path and os.path.exists(new_path):
-        emoji_cache[target_emoji] = new_path
-        save_emoji_cache()
+        cache_emoji_sound(target_emoji, new_path)
         msg = f"✅ Redid & downloaded new sound for {target_emoji}"
         if suggestion:
             msg += f"\nUsed user idea: '{suggestion}'"
@@ -623,14 +968,67 @@ async def adminclear(interaction: discord.Interaction, confirm: str):
             except Exception as e:
                 print(f"Failed to delete {sound_file}: {e}")
 
+    clear_alternates()
     emoji_cache.clear()
+    pack_sounds.clear()
+    playable_sounds.clear()
+    custom_emoji_keys.clear()
+    sound_index.clear()
+    forget_sound_info()
+    clear_pcm_cache(delete=True)
     save_emoji_cache()
 
     await interaction.followup.send(f"💣 Nuked {deleted} sound(s) and cleared emoji cache. It's all gone now.", ephemeral=True)
 
 
+@bot.tree.command(name="adminhotset", description="Show the most played sounds and how much of the library is warm")
+async def adminhotset(interaction: discord.Interaction):
+    """top of the play charts + how warm the caches are"""
+    await interaction.response.defer(ephemeral=True)
+
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, usage.flush)
+
+    hot = usage.hot_set(HOT_SET_SIZE)
+    hot_paths = hot_sound_paths()
+    warm_hot = sum(1 for p in hot_paths if is_mapped(p))
+
+    library = list(set(playable_sounds.values()))
+    built = await loop.run_in_executor(None, lambda: sum(1 for p in library if pcm_is_fresh(p)))
+
+    plays = playback_stats["warm"] + playback_stats["cold"]
+    warm_rate = f"{100 * playback_stats['warm'] / plays:.1f}%" if plays else "n/a"
+
+    embed = discord.Embed(
+        title="🔥 Hot Set",
+        description=f"Top **{len(hot)}** of {len(usage.emojis)} played sound(s), by plays decayed over time",
+        color=discord.Color.orange()
+    )
+
+    if hot:
+        lines = [f"{key} — {score:.1f} ({count} plays)" for key, score, count in hot[:15]]
+        embed.add_field(name="Hottest", value="\n".join(lines), inline=False)
+
+    embed.add_field(
+        name="Coverage",
+        value=(
+            f"Hot set warm: **{warm_hot}/{len(hot_paths)}**\n"
+            f"PCM built: **{built}/{len(library)}** sounds\n"
+            f"Plays served warm since start: **{warm_rate}** of {plays}"
+        ),
+        inline=False
+    )
+
+    await interaction.followup.send(embed=embed, ephemeral=True)
+
+
 @bot.tree.command(name="set", description="Manually assign a YouTube video sound to an emoji")
-async def set_emoji_sound(interaction: discord.Interaction, emoji: str, youtube_url: str):
+@app_commands.describe(
+    start="Clip start in seconds (default 0)",
+    end=f"Clip end in seconds (default start + {MAX_CLIP_SECONDS:g})"
+)
+async def set_emoji_sound(interaction: discord.Interaction, emoji: str, youtube_url: str,
+                          start: float = 0.0, end: float = None):
     """associate an emoji with an audio clip downloaded from YouTube"""
     await interaction.response.defer(ephemeral=True)
 
@@ -639,71 +1037,42 @@ async def set_emoji_sound(interaction: discord.Interaction, emoji: str, youtube_
         await interaction.followup.send("❌ No valid emoji found!", ephemeral=True)
         return
 
-    target_emoji = emojis[0]
+    if start < 0 or (end is not None and end <= start):
+        await interaction.followup.send("❌ end has to come after start (and start can't be negative)", ephemeral=True)
+        return
+
+    # clips are capped, so say so instead of quietly keeping less than was asked for
+    trimmed = ""
+    if end is None:
+        end = start + MAX_CLIP_SECONDS
+    elif end - start > MAX_CLIP_SECONDS:
+        end = start + MAX_CLIP_SECONDS
+        trimmed = f"\n✂️ Clips max out at {MAX_CLIP_SECONDS:g}s, so it was cut to {start:g}s–{end:g}s"
+
+    target_emoji = sound_key_for(emojis[0])
     safe_name = re.sub(r'[^a-zA-Z0-9_]+', '', target_emoji.encode("unicode_escape").decode("utf-8"))
     output_path = Path("sounds") / f"{safe_name}.mp3"
 
-    try:
-        import yt_dlp
-
-        ydl_opts = {
-            "format": "bestaudio/best",
-            "outtmpl": str(output_path),
-            "postprocessors": [
-                {
-                    "key": "FFmpegExtractAudio",
-                    "preferredcodec": "mp3",
-                    "preferredquality": "192",
-                }
-            ],
-            "quiet": True,
-            "no_warnings": True,
-        }
-
-        print(f"🎥 Attempting to download YouTube audio for emoji {target_emoji}...")
-        print(f"   URL: {youtube_url}")
-        print(f"   Output: {output_path}")
-
-        ydl_opts["outtmpl"] = str(output_path.with_suffix(""))  # remove extension before yt_dlp adds .mp3
-
-        # make sure we don't collide with a parallel /set operation
-        lock_path = output_path.with_suffix(".lock")
-        if lock_path.exists():
-            print(f"⚠️ Another /set task is already writing {output_path}, waiting for it to finish...")
-            retries = 0
-            while lock_path.exists() and retries < 30:
-                await asyncio.sleep(1)
-                retries += 1
+    # make sure we don't collide with a parallel /set for the same emoji
+    lock = set_locks[output_path]
+    if lock.locked():
+        print(f"⚠️ Another /set task is already writing {output_path}, waiting for it to finish...")
 
-        try:
-            lock_path.touch()
+    try:
+        async with lock:
             print(f"🎥 Attempting to download YouTube audio for emoji {target_emoji}...")
-            print(f"   URL: {youtube_url}")
-            print(f"   Output: {output_path}")
-
-            ydl_opts["outtmpl"] = str(output_path.with_suffix(""))  # ensure yt_dlp adds .mp3 itself
-
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                result = ydl.download([youtube_url])
-                print(f"   yt_dlp result code: {result}")
+            downloaded = await download_youtube_clip_async(youtube_url, output_path, start, end)
 
-            if output_path.exists():
+            if downloaded and output_path.exists():
                 print(f"✅ YouTube download complete: {output_path}")
-                emoji_cache[target_emoji] = str(output_path)
-                save_emoji_cache()
+                record_sound_info(str(output_path), f"youtube {youtube_url}", "set with /set")
+                cache_emoji_sound(target_emoji, str(output_path))
                 await interaction.followup.send(
-                    f"✅ Set new sound for {target_emoji} from YouTube!\nPath: `{output_path}`",
+                    f"✅ Set new sound for {target_emoji} from YouTube!{trimmed}\nPath: `{output_path}`",
                     ephemeral=True
                 )
             else:
-                print(f"❌ YouTube download failed, file not found at {output_path}")
                 await interaction.followup.send("❌ Failed to save YouTube audio.", ephemeral=True)
-        finally:
-            if lock_path.exists():
-                try:
-                    lock_path.unlink()
-                except Exception as e:
-                    print(f"⚠️ Could not remove lock file {lock_path}: {e}")
 
     except Exception as e:
         print(f"❌ Error during YouTube download for {target_emoji}: {e}")
@@ -0,0 +1,141 @@
+# HonkBot | All Rights Reserved
+
+import asyncio
+import os
+import time
+
+import numpy as np
+
+from pcm_library import SAMPLE_RATE, CHANNELS
+
+# the most extra latency a clip can pick up waiting for others to batch with
+BATCH_WINDOW_MS = float(os.getenv('BATCH_WINDOW_MS', '60'))
+# renders run on the event loop, so keep each one about this short
+RENDER_BUDGET_MS = 4.0
+MIN_BATCH_CLIPS = 4
+MAX_BATCH_CLIPS = 64
+# only hold clips back when the guild is busy: a message this recently, or this many clips still playing
+BUSY_GAP_MS = 4 * BATCH_WINDOW_MS
+BUSY_DEPTH = 3
+# a bus with this many clips still going counts as fully backed up when sizing batches
+DEPTH_FOR_FULL_BOOST = 8
+# smoothing for the render cost average
+COST_ALPHA = 0.2
+
+
+def render(parts: list) -> np.ndarray:
+    """mix (offset in samples, samples) parts into one buffer; int32 so the bus does the clipping like before"""
+    length = max(offset + len(samples) for offset, samples in parts)
+    out = np.zeros(length, dtype=np.int32)
+    for offset, samples in parts:
+        out[offset:offset + len(samples)] += samples
+    return out
+
+
+class ClipBatcher:
+    """
+    per-guild: clips from every message that lands within a short window get mixed into one buffer
+    and go to the bus as a single clip. the window only opens when the guild is busy (messages
+    arriving back to back or the bus piling up), so a lone emoji still goes out right away. a window
+    that only caught one message skips the mix and hands its clips over as they are
+    """
+
+    def __init__(self, sink, depth):
+        # sink(batch) plays a list of (samples, delay seconds, clips it holds), depth() is how many clips the bus still has going
+        self.sink = sink
+        self.depth = depth
+        # (offset in samples from when the window opened, that message's clips) per message
+        self._messages = []
+        self._clips = 0
+        self._opened = None
+        self._flush_handle = None
+        self.last_arrival = 0.0
+        # ewma of render time per clip, in ms
+        self.cost_per_clip_ms = 0.05
+        self.renders = 0
+        self.clips_rendered = 0
+        # flushes that only held one message, so nothing got mixed
+        self.passthroughs = 0
+        self.largest_batch = 0
+        self.added_latency_ms = 0.0
+        self.max_added_latency_ms = 0.0
+
+    @property
+    def pending(self) -> int:
+        """clips waiting for the current window to close"""
+        return self._clips
+
+    def window(self, now: float) -> float:
+        """how long a newly opened batch waits for company, in seconds"""
+        busy = (now - self.last_arrival) * 1000 < BUSY_GAP_MS or self.depth() >= BUSY_DEPTH
+        return BATCH_WINDOW_MS / 1000 if busy else 0.0
+
+    def batch_limit(self) -> int:
+        """how many clips one render may hold: what fits the render budget, more when the bus is backed up"""
+        by_cost = RENDER_BUDGET_MS / max(self.cost_per_clip_ms, 1e-3)
+        boost = 1 + min(self.depth(), DEPTH_FOR_FULL_BOOST) / DEPTH_FOR_FULL_BOOST
+        return int(max(MIN_BATCH_CLIPS, min(MAX_BATCH_CLIPS, by_cost * boost)))
+
+    def submit(self, clips: list):
+        """add one message's (samples, delay seconds) clips; must be called from the event loop"""
+        now = time.monotonic()
+        window = None
+        if self._opened is None:
+            window = self.window(now)
+            self._opened = now
+        self.last_arrival = now
+
+        # keep the spacing messages arrived with, so the batch sounds like it would have unbatched
+        arrived_at = int((now - self._opened) * SAMPLE_RATE) * CHANNELS
+        self._messages.append((arrived_at, clips))
+        self._clips += len(clips)
+
+        if window == 0.0 or self._clips >= self.batch_limit():
+            self.flush()
+        elif window is not None:
+            self._flush_handle = asyncio.get_running_loop().call_later(window, self.flush)
+
+    def flush(self):
+        """hand whatever's waiting to the sink, mixed down first if more than one message is in it"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        messages, clips, opened = self._messages, self._clips, self._opened
+        self._messages, self._clips, self._opened = [], 0, None
+        if not clips:
+            return
+
+        if len(messages) == 1:
+            # the bus staggers them itself and keeps playing the mapped views, no copy needed
+            batch = [(samples, delay, 1) for samples, delay in messages[0][1]]
+            self.passthroughs += 1
+        else:
+            parts = [
+                (arrived_at + int(delay * SAMPLE_RATE) * CHANNELS, samples)
+                for arrived_at, message in messages for samples, delay in message
+            ]
+            started = time.perf_counter()
+            batch = [(render(parts), 0.0, clips)]
+            cost_ms = (time.perf_counter() - started) * 1000
+            self.cost_per_clip_ms += COST_ALPHA * (cost_ms / clips - self.cost_per_clip_ms)
+            self.renders += 1
+            self.clips_rendered += clips
+
+        added_ms = (time.monotonic() - opened) * 1000
+        self.added_latency_ms = added_ms
+        self.max_added_latency_ms = max(self.max_added_latency_ms, added_ms)
+        self.largest_batch = max(self.largest_batch, clips)
+
+        try:
+            self.sink(batch)
+        except Exception as e:
+            print(f"Error playing batch of {clips} clip(s): {e}")
+
+    def cancel(self) -> int:
+        """drop anything waiting, returns how many clips that was"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        dropped = self._clips
+        self._messages, self._clips, self._opened = [], 0, None
+        return dropped
@@ -0,0 +1,373 @@
+# HonkBot | All Rights Reserved
+"""
+discovery benchmark against local stand-ins for OpenRouter and Freesound, so changes to the
+executor / http client / retry logic can be compared offline and reproducibly.
+
+    python discovery_bench.py --concurrency 1,4,16 --requests 64 --llm-latency 800 --rate-limit-rate 0.05
+
+the mock servers can also be left running on their own to point the real bot at:
+
+    python discovery_bench.py --serve
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+# how often the mock sends an sse keep-alive comment while a streamed answer is "thinking"
+KEEPALIVE_SECONDS = 0.1
+
+QUERIES = ["dog bark", "laughter", "fire crackling", "bell ringing", "clapping", "glass break", "car horn"]
+
+
+class MockBehaviour:
+    """latency / failure knobs shared by a mock server's handlers"""
+
+    def __init__(self, latency_ms, jitter_ms, error_rate, rate_limit_rate, seed):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+        # streamed requests the client hung up on before they finished
+        self.dropped = 0
+
+    def roll(self, latency_ms=None, tick=None):
+        """sleep for the configured latency (calling tick() every so often), then maybe fail; returns an error status or None"""
+        if latency_ms is None:
+            latency_ms = self.latency_ms
+        with self._lock:
+            self.requests += 1
+            delay = max(0.0, self._rng.gauss(latency_ms, self.jitter_ms)) / 1000
+            outcome = self._rng.random()
+        if tick is None:
+            time.sleep(delay)
+        else:
+            finish = time.monotonic() + delay
+            while (left := finish - time.monotonic()) > 0:
+                time.sleep(min(left, KEEPALIVE_SECONDS))
+                tick()
+        if outcome < self.rate_limit_rate:
+            with self._lock:
+                self.rate_limited += 1
+            return 429
+        if outcome < self.rate_limit_rate + self.error_rate:
+            with self._lock:
+                self.errors += 1
+            return 500
+        return None
+
+
+class QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        if status == 429:
+            self.send_header("Retry-After", "1")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def start_stream(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        self.wfile.flush()
+
+    def send_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b''
+
+
+def make_openrouter_handler(behaviour, model_latency):
+    class OpenRouterHandler(QuietHandler):
+        def do_POST(self):
+            try:
+                body = json.loads(self.read_body() or b'{}')
+            except ValueError:
+                body = {}
+            if urlparse(self.path).path != "/api/v1/chat/completions":
+                self.send_json(404, {"error": "not found"})
+                return
+            model = body.get("model")
+            content = json.dumps({
+                "sound_query": random.choice(QUERIES),
+                "description": "mock pick"
+            })
+
+            if not body.get("stream"):
+                status = behaviour.roll(model_latency.get(model))
+                if status:
+                    self.send_json(status, {"error": {"code": status, "message": "mock failure"}})
+                    return
+                self.send_json(200, {"choices": [{"message": {"role": "assistant", "content": content}}]})
+                return
+
+            # like openrouter: headers right away, keep-alives while waiting, errors as an event
+            self.start_stream()
+            try:
+                status = behaviour.roll(model_latency.get(model), tick=lambda: self.send_chunk(b": OPENROUTER PROCESSING\n\n"))
+                if status:
+                    event = {"error": {"code": status, "message": "mock failure"}}
+                else:
+                    event = {"choices": [{"delta": {"role": "assistant", "content": content}}]}
+                self.send_chunk(b"data: " + json.dumps(event).encode('utf-8') + b"\n\n")
+                self.send_chunk(b"data: [DONE]\n\n")
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+            except OSError:
+                with behaviour._lock:
+                    behaviour.dropped += 1
+                self.close_connection = True
+
+    return OpenRouterHandler
+
+
+def make_freesound_handler(behaviour, payload_bytes, result_count):
+    preview = os.urandom(payload_bytes)
+
+    class FreesoundHandler(QuietHandler):
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            parts = [p for p in parsed.path.split("/") if p]
+            base = f"http://{self.headers.get('Host')}"
+
+            # previews are served like a cdn, no failures injected beyond latency
+            if parts[:1] == ["previews"]:
+                time.sleep(behaviour.latency_ms / 1000)
+                self.send_response(200)
+                self.send_header("Content-Type", "audio/mpeg")
+                self.send_header("Content-Length", str(len(preview)))
+                self.end_headers()
+                self.wfile.write(preview)
+                return
+
+            status = behaviour.roll()
+            if status:
+                self.send_json(status, {"detail": "mock failure"})
+                return
+
+            if parts[:3] == ["apiv2", "search", "text"]:
+                query = parse_qs(parsed.query).get("query", [""])[0]
+                results = [{
+                    "id": 100000 + i,
+                    "name": f"{query} {i}",
+                    "duration": 1.0 + i * 0.3,
+                    "url": f"{base}/apiv2/sounds/{100000 + i}/",
+                    "previews": {"preview-hq-mp3": f"{base}/previews/{100000 + i}-hq.mp3"},
+                } for i in range(result_count)]
+                self.send_json(200, {"count": len(results), "results": results})
+            elif parts[:2] == ["apiv2", "sounds"] and len(parts) >= 3:
+                sound_id = parts[2]
+                self.send_json(200, {
+                    "id": int(sound_id),
+                    "previews": {
+                        "preview-hq-mp3": f"{base}/previews/{sound_id}-hq.mp3",
+                        "preview-lq-mp3": f"{base}/previews/{sound_id}-lq.mp3",
+                    },
+                })
+            else:
+                self.send_json(404, {"detail": "not found"})
+
+    return FreesoundHandler
+
+
+def start_server(handler):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_mock_servers(args):
+    llm = MockBehaviour(args.llm_latency, args.jitter, args.error_rate, args.rate_limit_rate, args.seed)
+    freesound = MockBehaviour(args.freesound_latency, args.jitter, args.error_rate, args.rate_limit_rate, args.seed + 1)
+    model_latency = {}
+    for item in filter(None, args.model_latency.split(",")):
+        model, _, latency = item.rpartition("=")
+        model_latency[model.strip()] = float(latency)
+    llm_server = start_server(make_openrouter_handler(llm, model_latency))
+    freesound_server = start_server(make_freesound_handler(freesound, args.payload_kb * 1024, args.results))
+    return (llm_server, llm), (freesound_server, freesound)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_level(discovery, level, total, run_id):
+    """fire `total` discoveries with at most `level` in flight, returns per-request (latency, ok)"""
+    gate = asyncio.Semaphore(level)
+
+    async def one(i):
+        async with gate:
+            started = time.perf_counter()
+            # unique names so the "already downloaded" shortcut never kicks in
+            path = await discovery.find_and_download_sound_for_emoji("🦆", f"bench {run_id} {level} {i}")
+            return time.perf_counter() - started, path is not None
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(total)))
+    return results, time.perf_counter() - started
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark sound discovery against mock OpenRouter/Freesound servers")
+    parser.add_argument('--concurrency', default="1,2,4,8,16", help="comma separated discovery concurrency levels")
+    parser.add_argument('--requests', type=int, default=32, help="discoveries per concurrency level")
+    parser.add_argument('--workers', type=int, default=None, help="override the discovery thread pool size")
+    parser.add_argument('--llm-latency', type=float, default=600.0, help="mean OpenRouter latency in ms")
+    parser.add_argument('--models', default=None, help="comma separated OPENROUTER_MODELS to hedge across")
+    parser.add_argument('--model-latency', default="", help="per-model mean latency overrides, e.g. slow/model=4000,fast/model=300")
+    parser.add_argument('--freesound-latency', type=float, default=150.0, help="mean Freesound latency in ms")
+    parser.add_argument('--jitter', type=float, default=50.0, help="latency std deviation in ms")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of API calls that 500")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="fraction of API calls that 429")
+    parser.add_argument('--payload-kb', type=int, default=40, help="preview mp3 size in KB")
+    parser.add_argument('--results', type=int, default=5, help="search results returned per query")
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--json', action='store_true', help="print the report as json")
+    parser.add_argument('--verbose', action='store_true', help="show discovery's own logging")
+    parser.add_argument('--serve', action='store_true', help="just run the mock servers and print their urls")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    (llm_server, llm), (freesound_server, freesound) = start_mock_servers(args)
+    llm_url = f"http://127.0.0.1:{llm_server.server_address[1]}/api/v1/chat/completions"
+    freesound_url = f"http://127.0.0.1:{freesound_server.server_address[1]}/apiv2"
+
+    if args.serve:
+        print(f"OPENROUTER_URL={llm_url}")
+        print(f"FREESOUND_API_URL={freesound_url}")
+        print("Ctrl+C to stop")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            return 0
+
+    # discovery reads these at import time
+    os.environ["OPENROUTER_URL"] = llm_url
+    os.environ["FREESOUND_API_URL"] = freesound_url
+    os.environ.setdefault("OPENROUTER_API_KEY", "bench")
+    os.environ.setdefault("FREESOUND_API_KEY", "bench")
+
+    workdir = tempfile.mkdtemp(prefix="honkbot-discovery-bench-")
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, repo_dir)
+    os.chdir(workdir)
+
+    try:
+        import sound_discovery as discovery
+        discovery.OPENROUTER_URL = llm_url
+        discovery.FREESOUND_API_URL = freesound_url
+        discovery.OPENROUTER_API_KEY = os.environ["OPENROUTER_API_KEY"]
+        discovery.FREESOUND_API_KEY = os.environ["FREESOUND_API_KEY"]
+        discovery.SOUNDS_DIR = Path(workdir) / "sounds"
+        discovery.SOUNDS_DIR.mkdir(exist_ok=True)
+        if args.models:
+            discovery.OPENROUTER_MODELS = [m.strip() for m in args.models.split(",") if m.strip()]
+        if args.workers:
+            discovery.executor = ThreadPoolExecutor(max_workers=args.workers)
+            discovery.prefetch_executor = ThreadPoolExecutor(max_workers=args.workers * discovery.PREFETCH_CANDIDATES)
+            discovery.llm_executor = ThreadPoolExecutor(max_workers=args.workers * max(2, len(discovery.OPENROUTER_MODELS)))
+
+        levels = [int(x) for x in args.concurrency.split(",") if x.strip()]
+        rows = []
+        run_id = int(time.time())
+
+        for level in levels:
+            if not args.verbose:
+                devnull = open(os.devnull, 'w')
+                real_stdout, sys.stdout = sys.stdout, devnull
+            try:
+                results, elapsed = asyncio.run(run_level(discovery, level, args.requests, run_id))
+            finally:
+                if not args.verbose:
+                    sys.stdout = real_stdout
+                    devnull.close()
+
+            latencies = [latency * 1000 for latency, _ in results]
+            ok = sum(1 for _, success in results if success)
+            rows.append({
+                "concurrency": level,
+                "requests": len(results),
+                "succeeded": ok,
+                "throughput_per_sec": round(len(results) / elapsed, 2),
+                "p50_ms": round(percentile(latencies, 50), 1),
+                "p99_ms": round(percentile(latencies, 99), 1),
+                "max_ms": round(max(latencies, default=0.0), 1),
+            })
+
+        summary = {
+            "workers": discovery.executor._max_workers,
+            "models": {
+                model: {
+                    "successes": stats.successes,
+                    "failures": stats.failures,
+                    "p50_ms": round((stats.latency_percentile(0.5) or 0) * 1000, 1),
+                }
+                for model, stats in discovery.model_stats.items()
+                if model in discovery.OPENROUTER_MODELS
+            },
+            "llm": {"requests": llm.requests, "errors": llm.errors, "rate_limited": llm.rate_limited, "dropped": llm.dropped},
+            "freesound": {"requests": freesound.requests, "errors": freesound.errors, "rate_limited": freesound.rate_limited},
+            "levels": rows,
+        }
+
+        if args.json:
+            print(json.dumps(summary, indent=2))
+        else:
+            print(f"\n🔍 Discovery benchmark — {summary['workers']} worker(s), "
+                  f"llm ~{args.llm_latency:g}ms, freesound ~{args.freesound_latency:g}ms, "
+                  f"{args.error_rate:.0%} errors, {args.rate_limit_rate:.0%} 429s")
+            print(f"   {'conc':>5} {'ok':>7} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+            for row in rows:
+                print(f"   {row['concurrency']:>5} {row['succeeded']:>3}/{row['requests']:<3} {row['throughput_per_sec']:>8} "
+                      f"{row['p50_ms']:>9} {row['p99_ms']:>9} {row['max_ms']:>9}")
+            for model, stats in summary["models"].items():
+                print(f"   model {model}: {stats['successes']} ok, {stats['failures']} failed, p50 {stats['p50_ms']}ms")
+            print(f"   llm calls: {llm.requests} ({llm.errors} errors, {llm.rate_limited} 429s, {llm.dropped} cut off), "
+                  f"freesound calls: {freesound.requests} ({freesound.errors} errors, {freesound.rate_limited} 429s)")
+    finally:
+        os.chdir(repo_dir)
+        shutil.rmtree(workdir, ignore_errors=True)
+        llm_server.shutdown()
+        freesound_server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
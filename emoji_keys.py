@@ -0,0 +1,53 @@
+# HonkBot | All Rights Reserved
+
+import re
+from functools import lru_cache
+
+ZWJ = '\u200D'
+VARIATION_SELECTORS = frozenset({'\uFE0E', '\uFE0F'})
+SKIN_TONES = frozenset(chr(c) for c in range(0x1F3FB, 0x1F400))
+GENDER_SIGNS = frozenset({'\u2640', '\u2642'})
+
+CUSTOM_EMOJI_PARTS = re.compile(r'<a?:(\w+):(\d{17,20})>')
+
+
+def custom_emoji_id(emoji: str) -> str:
+    """the numeric id of a custom emoji, None for unicode ones"""
+    match = CUSTOM_EMOJI_PARTS.fullmatch(emoji)
+    return match.group(2) if match else None
+
+
+@lru_cache(maxsize=4096)
+def canonical_key(emoji: str) -> str:
+    """
+    the key an emoji's sound is stored under: skin tones, variation selectors and gender signs
+    stripped (👍🏽 -> 👍, 🏃‍♀️ -> 🏃), custom emojis in their static <:name:id> form
+    """
+    match = CUSTOM_EMOJI_PARTS.fullmatch(emoji)
+    if match:
+        return f"<:{match.group(1)}:{match.group(2)}>"
+
+    parts = []
+    for part in emoji.split(ZWJ):
+        part = ''.join(c for c in part if c not in VARIATION_SELECTORS and c not in SKIN_TONES)
+        if part:
+            parts.append(part)
+
+    # a gender sign only means something glued onto a person
+    if len(parts) > 1:
+        parts = [p for p in parts if p not in GENDER_SIGNS] or parts
+
+    return ZWJ.join(parts) or emoji
+
+
+@lru_cache(maxsize=4096)
+def lookup_keys(emoji: str) -> tuple:
+    """keys to try for an emoji, most specific first: exact, canonical, then each zwj component"""
+    keys = [emoji]
+    canonical = canonical_key(emoji)
+    keys.append(canonical)
+    if ZWJ in canonical:
+        keys.extend(canonical.split(ZWJ))
+
+    seen = set()
+    return tuple(k for k in keys if not (k in seen or seen.add(k)))
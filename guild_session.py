@@ -0,0 +1,88 @@
+# HonkBot | All Rights Reserved
+
+import time
+
+
+class GuildSession:
+    """everything the message hot path needs for one guild the bot is in voice in"""
+
+    __slots__ = (
+        'guild_id', 'voice_client', 'channel_id', 'bus', 'batcher', 'joined_at', 'messages', 'clips_queued', 'discoveries'
+    )
+
+    def __init__(self, guild_id: int, voice_client, channel_id: int):
+        self.guild_id = guild_id
+        self.voice_client = voice_client
+        self.channel_id = channel_id
+        # the guild's MixingBus, created on first play
+        self.bus = None
+        # the guild's ClipBatcher, also created on first play
+        self.batcher = None
+        self.joined_at = time.monotonic()
+        self.messages = 0
+        self.clips_queued = 0
+        self.discoveries = 0
+
+    def is_connected(self) -> bool:
+        return self.voice_client is not None and self.voice_client.is_connected()
+
+    @property
+    def player_state(self) -> str:
+        voice_client = self.voice_client
+        if voice_client is None or not voice_client.is_connected():
+            return "disconnected"
+        if voice_client.is_playing():
+            return "playing"
+        if voice_client.is_paused():
+            return "idle"
+        return "stopped"
+
+    @property
+    def depth(self) -> int:
+        """buffers the bus is still playing or about to (a pre-mixed batch counts once)"""
+        return self.bus.pending if self.bus is not None else 0
+
+    @property
+    def clips_playing(self) -> int:
+        """clips the bus is still playing or about to, counting each one inside a batch"""
+        return self.bus.clip_count if self.bus is not None else 0
+
+    def drop_bus(self) -> int:
+        """cut everything the bus is playing and forget it, returns how many clips got dropped"""
+        bus, self.bus = self.bus, None
+        return bus.clear() if bus is not None else 0
+
+    def skip(self) -> int:
+        """drop everything playing or waiting on a batch, returns how many clips; the bus itself keeps running"""
+        dropped = self.batcher.cancel() if self.batcher is not None else 0
+        return dropped + (self.bus.clear() if self.bus is not None else 0)
+
+
+# guild id -> session, only for guilds the bot is currently in voice in
+sessions = {}
+
+
+def open_session(voice_client, channel_id: int = None) -> GuildSession:
+    """start (or re-point) the session for a voice client's guild"""
+    guild_id = voice_client.guild.id
+    if channel_id is None:
+        channel_id = voice_client.channel.id
+
+    session = sessions.get(guild_id)
+    if session is None:
+        session = sessions[guild_id] = GuildSession(guild_id, voice_client, channel_id)
+    else:
+        if session.voice_client is not voice_client:
+            session.drop_bus()
+        session.voice_client = voice_client
+        session.channel_id = channel_id
+    return session
+
+
+def close_session(guild_id: int) -> GuildSession:
+    session = sessions.pop(guild_id, None)
+    if session is not None:
+        if session.batcher is not None:
+            session.batcher.cancel()
+        session.drop_bus()
+    return session
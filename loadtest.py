@@ -0,0 +1,487 @@
+# HonkBot | All Rights Reserved
+"""
+offline load test: fires a synthetic message firehose at on_message across fake guilds,
+with fake voice clients pulling frames off each guild's AudioSource like discord would.
+
+    python loadtest.py --guilds 50 --rate 200 --duration 30
+
+needs ffmpeg on PATH (to make the synthetic sounds), no discord account or API keys.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import contextvars
+import io
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # windows
+    resource = None
+
+FRAME_SECONDS = 0.02
+
+# unicode emojis the synthetic library gets built from, the rest of the range is "new"
+KNOWN_EMOJI_RANGE = range(0x1F600, 0x1F640)
+NEW_EMOJI_RANGE = range(0x1F300, 0x1F5FF)
+
+# the on_message call a clip came from, so the fake voice client can time it
+message_sent_at = contextvars.ContextVar('message_sent_at', default=None)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def current_rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError):
+        return 0.0
+
+
+def peak_rss_mb():
+    if resource is None:
+        return current_rss_mb()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # linux reports KB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class FakeGuild:
+    def __init__(self, guild_id):
+        self.id = guild_id
+        self.name = f"guild-{guild_id}"
+
+
+class FakeChannel:
+    def __init__(self, channel_id, guild):
+        self.id = channel_id
+        self.guild = guild
+        self.name = f"voice-{channel_id}"
+
+
+class FakeVoiceState:
+    def __init__(self, channel):
+        self.channel = channel
+
+
+class FakeAuthor:
+    def __init__(self, user_id, channel):
+        self.id = user_id
+        self.bot = False
+        self.voice = FakeVoiceState(channel)
+
+
+class FakeMessage:
+    def __init__(self, content, author, guild):
+        self.content = content
+        self.author = author
+        self.guild = guild
+
+
+class FakeVoiceClient:
+    """stands in for discord.VoiceClient, pulls 20ms frames off the source on its own thread like AudioPlayer does"""
+
+    def __init__(self, guild, channel, stats, speed):
+        self.guild = guild
+        self.channel = channel
+        self.source = None
+        self.stats = stats
+        self.frame_interval = FRAME_SECONDS / speed if speed > 0 else 0.0
+        self._resumed = threading.Event()
+        self._end = threading.Event()
+        self._thread = None
+        # clips enqueued since the last read, as message send times; filled from the event loop,
+        # drained by the player thread
+        self.pending_starts = []
+        self._starts_lock = threading.Lock()
+
+    def note_starts(self, sent_times):
+        with self._starts_lock:
+            self.pending_starts.extend(sent_times)
+
+    def is_connected(self):
+        return True
+
+    def is_playing(self):
+        return self._thread is not None and self._resumed.is_set() and not self._end.is_set()
+
+    def is_paused(self):
+        return self._thread is not None and not self._resumed.is_set() and not self._end.is_set()
+
+    def play(self, source, *, after=None):
+        self.source = source
+        self._end.clear()
+        self._resumed.set()
+        self._thread = threading.Thread(target=self._run, args=(after,), daemon=True)
+        self._thread.start()
+
+    def pause(self):
+        self._resumed.clear()
+
+    def resume(self):
+        self._resumed.set()
+
+    def stop(self):
+        self._end.set()
+        self._resumed.set()
+
+    def _run(self, after):
+        stats = self.stats
+        next_frame = time.perf_counter()
+        try:
+            while not self._end.is_set():
+                if not self._resumed.is_set():
+                    self._resumed.wait()
+                    next_frame = time.perf_counter()
+                    continue
+
+                with self._starts_lock:
+                    starts, self.pending_starts = self.pending_starts, []
+                read_started = time.perf_counter()
+                data = self.source.read()
+                read_done = time.perf_counter()
+                if not data:
+                    break
+
+                stats.frames += 1
+                stats.read_times.append(read_done - read_started)
+                for sent_at in starts:
+                    stats.first_frame_latencies.append(read_done - sent_at)
+
+                if self.frame_interval:
+                    next_frame += self.frame_interval
+                    slack = next_frame - time.perf_counter()
+                    if slack > 0:
+                        time.sleep(slack)
+                    elif -slack > self.frame_interval:
+                        # more than a whole frame behind, discord would have heard a gap
+                        stats.underruns += 1
+                        next_frame = time.perf_counter()
+        finally:
+            if after:
+                after(None)
+
+
+class Stats:
+    def __init__(self):
+        self.messages_sent = 0
+        self.messages_handled = 0
+        self.message_errors = 0
+        self.handle_times = []
+        self.first_frame_latencies = []
+        self.read_times = []
+        self.frames = 0
+        self.underruns = 0
+        self.discoveries = 0
+        self.renders = 0
+        self.clips_rendered = 0
+        self.largest_batch = 0
+        self.passthroughs = 0
+        self.max_added_latency_ms = 0.0
+
+
+def make_tone(path, freq, seconds):
+    subprocess.run(
+        ['ffmpeg', '-v', 'error', '-y', '-f', 'lavfi', '-i', f"sine=f={freq}:d={seconds}", str(path)],
+        check=True
+    )
+
+
+def build_library(honk, count, clip_seconds):
+    """synthetic sounds for the first `count` known emojis, plus a template for fake discovery to hand out"""
+    sounds_dir = Path("sounds")
+    sounds_dir.mkdir(exist_ok=True)
+    known = [chr(c) for c in KNOWN_EMOJI_RANGE][:count]
+
+    for i, emoji in enumerate(known):
+        path = sounds_dir / f"emoji_{ord(emoji):04x}.mp3"
+        make_tone(path, 220 + 20 * i, clip_seconds)
+        honk.emoji_cache[emoji] = path.as_posix()
+
+    donor = sounds_dir / "discovered_template.mp3"
+    make_tone(donor, 880, clip_seconds)
+
+    honk.save_emoji_cache()
+    honk.index_emoji_cache()
+    honk.build_missing_pcm(list(honk.playable_sounds.values()))
+    return known, donor
+
+
+def install_fake_discovery(honk, donor, delay, stats):
+    """discovery that just waits a bit and copies a template sound, no network"""
+    async def fake_find_and_download(emoji, emoji_name=None):
+        await asyncio.sleep(delay)
+        stats.discoveries += 1
+        name = emoji_name or '-'.join(f'{ord(c):04x}' for c in emoji)
+        path = Path("sounds") / f"discovered_{name}.mp3"
+        shutil.copyfile(donor, path)
+        return path.as_posix()
+
+    honk.find_and_download_sound_for_emoji = fake_find_and_download
+
+
+def install_clip_timing(honk):
+    """
+    note each message's send time when its batch reaches the bus. a message that joined a batch
+    late starts that much later inside the mix, so its start is shifted back by the same amount
+    """
+    original_submit = honk.ClipBatcher.submit
+    original_play_batch = honk.play_batch
+    arrivals = {}
+
+    def timed_submit(batcher, clips):
+        sent_at = message_sent_at.get()
+        if sent_at is not None:
+            arrivals.setdefault(id(batcher), []).append((sent_at, time.perf_counter()))
+        original_submit(batcher, clips)
+
+    def timed_play_batch(session, batch):
+        original_play_batch(session, batch)
+        batch = arrivals.pop(id(session.batcher), [])
+        if batch and session.voice_client is not None:
+            opened = batch[0][1]
+            session.voice_client.note_starts(sent_at - (arrived - opened) for sent_at, arrived in batch)
+
+    honk.ClipBatcher.submit = timed_submit
+    honk.play_batch = timed_play_batch
+
+
+class MessageFactory:
+    def __init__(self, args, known_emojis):
+        self.args = args
+        self.known = known_emojis
+        self.rng = random.Random(args.seed)
+        self.new_unicode = [chr(c) for c in NEW_EMOJI_RANGE]
+        self.rng.shuffle(self.new_unicode)
+        self.known_custom = [f"<:honk{i}:{100000000000000000 + i}>" for i in range(20)]
+        self.next_custom_id = 200000000000000000
+
+    def emoji(self):
+        rng = self.rng
+        is_custom = rng.random() < self.args.custom_rate
+        if rng.random() < self.args.new_emoji_rate:
+            if is_custom or not self.new_unicode:
+                self.next_custom_id += 1
+                return f"<:new{self.next_custom_id}:{self.next_custom_id}>"
+            return self.new_unicode.pop()
+        if is_custom:
+            return rng.choice(self.known_custom)
+        return rng.choice(self.known)
+
+    def content(self):
+        words = ["lol", "ok", "bruh", "honk", "what", "no way"]
+        # poisson-ish emoji count around the configured density
+        count = 0
+        while self.rng.random() < self.args.emoji_density / (1 + self.args.emoji_density):
+            count += 1
+        parts = [self.rng.choice(words)]
+        for _ in range(count):
+            parts.append(self.emoji())
+        return " ".join(parts)
+
+
+async def handle(honk, message, stats):
+    sent_at = time.perf_counter()
+    message_sent_at.set(sent_at)
+    try:
+        await honk.on_message(message)
+    except Exception as e:
+        stats.message_errors += 1
+        print(f"on_message failed: {e!r}", file=sys.__stderr__)
+    stats.messages_handled += 1
+    stats.handle_times.append(time.perf_counter() - sent_at)
+
+
+async def drive(honk, args, known_emojis, stats):
+    guilds = []
+    for g in range(args.guilds):
+        guild = FakeGuild(1000 + g)
+        channel = FakeChannel(5000 + g, guild)
+        voice_client = FakeVoiceClient(guild, channel, stats, args.speed)
+        honk.open_session(voice_client)
+        authors = [FakeAuthor(9000 + g * 100 + u, channel) for u in range(args.users)]
+        guilds.append((guild, authors))
+
+    # custom emojis "already known" get sounds too, so they aren't all discoveries
+    factory = MessageFactory(args, known_emojis)
+    for i, custom in enumerate(factory.known_custom):
+        honk.cache_emoji_sound(custom, honk.emoji_cache[known_emojis[i % len(known_emojis)]])
+
+    tasks = set()
+    interval = 1.0 / args.rate
+    started = time.perf_counter()
+    next_send = started
+
+    while time.perf_counter() - started < args.duration:
+        guild, authors = guilds[factory.rng.randrange(len(guilds))]
+        message = FakeMessage(factory.content(), factory.rng.choice(authors), guild)
+        task = asyncio.create_task(handle(honk, message, stats))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        stats.messages_sent += 1
+
+        next_send += interval
+        delay = next_send - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        elif stats.messages_sent % 100 == 0:
+            # still let the loop breathe if we're behind
+            await asyncio.sleep(0)
+
+    send_elapsed = time.perf_counter() - started
+    backlog = len(tasks)
+    if tasks:
+        await asyncio.wait(tasks, timeout=args.drain)
+    # let the last clips start
+    await asyncio.sleep(0.2)
+    return send_elapsed, backlog, time.perf_counter() - started
+
+
+def report(args, stats, send_elapsed, backlog, total_elapsed, cpu_seconds):
+    latencies_ms = [v * 1000 for v in stats.first_frame_latencies]
+    handle_ms = [v * 1000 for v in stats.handle_times]
+    read_us = [v * 1_000_000 for v in stats.read_times]
+    result = {
+        "guilds": args.guilds,
+        "target_rate": args.rate,
+        "messages_sent": stats.messages_sent,
+        "messages_handled": stats.messages_handled,
+        "message_errors": stats.message_errors,
+        "backlog_at_end_of_send": backlog,
+        "sustained_msgs_per_sec": round(stats.messages_handled / total_elapsed, 1),
+        "offered_msgs_per_sec": round(stats.messages_sent / send_elapsed, 1),
+        "discoveries": stats.discoveries,
+        "first_frame_ms": {
+            "count": len(latencies_ms),
+            "p50": round(percentile(latencies_ms, 50), 2),
+            "p90": round(percentile(latencies_ms, 90), 2),
+            "p99": round(percentile(latencies_ms, 99), 2),
+            "max": round(max(latencies_ms, default=0.0), 2),
+        },
+        "on_message_ms": {
+            "p50": round(percentile(handle_ms, 50), 2),
+            "p99": round(percentile(handle_ms, 99), 2),
+        },
+        "frame_read_us": {
+            "p50": round(percentile(read_us, 50), 1),
+            "p99": round(percentile(read_us, 99), 1),
+        },
+        "batching": {
+            "renders": stats.renders,
+            "clips_per_render": round(stats.clips_rendered / stats.renders, 2) if stats.renders else 0.0,
+            "largest_batch": stats.largest_batch,
+            "passthroughs": stats.passthroughs,
+            "max_added_latency_ms": round(stats.max_added_latency_ms, 2),
+        },
+        "frames": stats.frames,
+        "underruns": stats.underruns,
+        "cpu_percent": round(100 * cpu_seconds / total_elapsed, 1),
+        "rss_mb": round(current_rss_mb(), 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print(f"\n🦆 HonkBot load test — {args.guilds} guild(s), {args.rate} msg/s offered for {args.duration}s")
+    print(f"   messages: {stats.messages_handled}/{stats.messages_sent} handled, {stats.message_errors} error(s), "
+          f"{backlog} still in flight when sending stopped")
+    print(f"   sustained: {result['sustained_msgs_per_sec']} msg/s (offered {result['offered_msgs_per_sec']})")
+    print(f"   discoveries: {stats.discoveries}")
+    ff = result['first_frame_ms']
+    print(f"   message -> first frame: p50 {ff['p50']}ms  p90 {ff['p90']}ms  p99 {ff['p99']}ms  max {ff['max']}ms  "
+          f"({ff['count']} clip(s))")
+    print(f"   on_message: p50 {result['on_message_ms']['p50']}ms  p99 {result['on_message_ms']['p99']}ms")
+    print(f"   frame read: p50 {result['frame_read_us']['p50']}us  p99 {result['frame_read_us']['p99']}us")
+    batching = result['batching']
+    print(f"   batching: {batching['renders']} render(s), {batching['clips_per_render']} clip(s) per render, "
+          f"{batching['passthroughs']} unmixed, "
+          f"largest {batching['largest_batch']}, max added latency {batching['max_added_latency_ms']}ms")
+    print(f"   frames: {stats.frames}, underruns: {stats.underruns}")
+    print(f"   cpu: {result['cpu_percent']}%  rss: {result['rss_mb']}MB (peak {result['peak_rss_mb']}MB)")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline HonkBot load test with fake guilds and voice clients")
+    parser.add_argument('--guilds', type=int, default=10, help="number of fake guilds with a connected voice client")
+    parser.add_argument('--users', type=int, default=5, help="fake users per guild")
+    parser.add_argument('--rate', type=float, default=50.0, help="messages per second across all guilds")
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds to keep sending")
+    parser.add_argument('--drain', type=float, default=10.0, help="seconds to wait for in-flight messages afterwards")
+    parser.add_argument('--emoji-density', type=float, default=1.5, help="average emojis per message")
+    parser.add_argument('--custom-rate', type=float, default=0.2, help="fraction of emojis that are custom emojis")
+    parser.add_argument('--new-emoji-rate', type=float, default=0.02, help="fraction of emojis that need discovery")
+    parser.add_argument('--discovery-delay', type=float, default=1.0, help="seconds the fake discovery takes")
+    parser.add_argument('--library', type=int, default=40, help="number of known sounds to generate")
+    parser.add_argument('--clip-seconds', type=float, default=0.8, help="length of each synthetic sound")
+    parser.add_argument('--speed', type=float, default=1.0, help="playback pace multiplier (0 = as fast as possible)")
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--json', action='store_true', help="print the report as json")
+    parser.add_argument('--verbose', action='store_true', help="show the bot's own logging")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if not shutil.which('ffmpeg'):
+        print("ffmpeg needs to be on PATH to build the synthetic sound library")
+        return 1
+
+    # the bot keeps its cache and sounds relative to cwd, so give it a scratch one
+    workdir = tempfile.mkdtemp(prefix="honkbot-loadtest-")
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, repo_dir)
+    os.chdir(workdir)
+
+    try:
+        log = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+        stats = Stats()
+        with log:
+            import bot as honk
+
+            known_emojis, donor = build_library(honk, args.library, args.clip_seconds)
+            install_fake_discovery(honk, donor, args.discovery_delay, stats)
+            install_clip_timing(honk)
+
+            cpu_started = time.process_time()
+            send_elapsed, backlog, total_elapsed = asyncio.run(drive(honk, args, known_emojis, stats))
+            cpu_seconds = time.process_time() - cpu_started
+
+            for session in list(honk.sessions.values()):
+                session.voice_client.stop()
+                batcher = session.batcher
+                if batcher is not None:
+                    stats.renders += batcher.renders
+                    stats.clips_rendered += batcher.clips_rendered
+                    stats.largest_batch = max(stats.largest_batch, batcher.largest_batch)
+                    stats.passthroughs += batcher.passthroughs
+                    stats.max_added_latency_ms = max(stats.max_added_latency_ms, batcher.max_added_latency_ms)
+
+        report(args, stats, send_elapsed, backlog, total_elapsed, cpu_seconds)
+    finally:
+        os.chdir(repo_dir)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+# HonkBot | All Rights Reserved
+
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from process_budget import media_processes
+
+# discord wants 48kHz stereo s16le
+SAMPLE_RATE = 48000
+CHANNELS = 2
+
+# pre-decoded raw pcm lives next to the mp3s, one .pcm per sound
+PCM_DIR = Path("sounds") / "pcm"
+
+# python's mmap keeps an fd open per mapping, so cap how many we hold on to
+MAX_MAPPED_SOUNDS = 512
+
+_mapped = OrderedDict()
+_mapped_lock = threading.Lock()
+# sound path -> lock held while its .pcm builds, so different sounds decode in parallel (up to the
+# process budget) while two callers never build the same file. kept forever, it's one per sound
+_build_locks = {}
+
+# sound path -> (pack, entry) for sounds served out of a mounted sound pack (see sound_pack.py)
+_packed = {}
+
+EMPTY_PCM = np.zeros(0, dtype=np.int16)
+
+
+def mount_pack(pack) -> int:
+    """serve a pack's sounds in place; files on disk still win over the pack. returns sounds mounted"""
+    with _mapped_lock:
+        for sound_path, entry in pack.by_path.items():
+            _packed[sound_path] = (pack, entry)
+            _mapped.pop(sound_path, None)
+    return len(pack.by_path)
+
+
+def _from_pack(sound_path: str):
+    """(pack, entry) if this sound only exists inside a mounted pack"""
+    packed = _packed.get(sound_path)
+    if packed is None or os.path.exists(sound_path):
+        return None
+    return packed
+
+
+def has_source(sound_path: str) -> bool:
+    return os.path.exists(sound_path) or sound_path in _packed
+
+
+def read_source(sound_path: str) -> bytes:
+    """the encoded clip, from disk or from a mounted pack"""
+    packed = _from_pack(sound_path)
+    if packed:
+        pack, entry = packed
+        return pack.encoded(entry)
+    with open(sound_path, 'rb') as f:
+        return f.read()
+
+
+def decode_to_pcm(sound_path: str) -> bytes:
+    """decode a clip to interleaved 48kHz stereo s16le"""
+    packed = _from_pack(sound_path)
+    result = media_processes.run(
+        ['ffmpeg', '-v', 'error', '-i', 'pipe:0' if packed else sound_path,
+         '-f', 's16le', '-ar', str(SAMPLE_RATE), '-ac', str(CHANNELS), 'pipe:1'],
+        timeout=30,
+        label="ffmpeg decode",
+        input=read_source(sound_path) if packed else None
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg couldn't decode {sound_path}: {result.stderr.decode(errors='replace')}")
+    return result.stdout
+
+
+def pcm_path_for(sound_path: str) -> Path:
+    return PCM_DIR / f"{Path(sound_path).stem}.pcm"
+
+
+def pcm_is_fresh(sound_path: str) -> bool:
+    """true if the .pcm exists and is at least as new as the source clip"""
+    packed = _from_pack(sound_path)
+    try:
+        source_mtime = packed[0].mtime if packed else os.path.getmtime(sound_path)
+        return os.path.getmtime(pcm_path_for(sound_path)) >= source_mtime
+    except OSError:
+        return False
+
+
+def build_pcm(sound_path: str) -> Path:
+    """decode a clip into its .pcm companion unless it's already up to date"""
+    pcm_path = pcm_path_for(sound_path)
+    if pcm_is_fresh(sound_path):
+        return pcm_path
+
+    PCM_DIR.mkdir(parents=True, exist_ok=True)
+    data = decode_to_pcm(sound_path)
+
+    # write then rename so other shards never map a half-written file
+    tmp_path = pcm_path.with_name(f"{pcm_path.name}.tmp-{os.getpid()}-{threading.get_ident()}")
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    try:
+        os.replace(tmp_path, pcm_path)
+    except OSError:
+        # windows won't replace a file someone still has mapped, the old one stays until next time
+        os.remove(tmp_path)
+        raise
+    return pcm_path
+
+
+def _ensure_pcm(sound_path: str) -> bool:
+    """build a clip's .pcm if it's missing or stale, returns whether it had to"""
+    if pcm_is_fresh(sound_path):
+        return False
+    with _mapped_lock:
+        lock = _build_locks.setdefault(sound_path, threading.Lock())
+    with lock:
+        # whoever held the lock before us may have just built it
+        if pcm_is_fresh(sound_path):
+            return False
+        build_pcm(sound_path)
+        return True
+
+
+def build_missing_pcm(sound_paths) -> int:
+    """bring the .pcm library up to date for a batch of sounds, returns how many got (re)built"""
+    built = 0
+    for sound_path in sound_paths:
+        try:
+            built += _ensure_pcm(sound_path)
+        except Exception as e:
+            print(f"Error building pcm for {sound_path}: {e}")
+    return built
+
+
+def _map_pcm(pcm_path: Path) -> np.ndarray:
+    with open(pcm_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return EMPTY_PCM
+        # read-only shared mapping, so every shard on the box shares the same page cache
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return np.frombuffer(mapped, dtype=np.int16)
+
+
+def cached_pcm(sound_path: str):
+    """mapped samples if the sound is already mapped, without touching disk"""
+    with _mapped_lock:
+        samples = _mapped.get(sound_path)
+        if samples is not None:
+            _mapped.move_to_end(sound_path)
+        return samples
+
+
+def get_pcm(sound_path: str) -> np.ndarray:
+    """samples for a clip straight out of its mapped .pcm, building it first if needed"""
+    samples = cached_pcm(sound_path)
+    if samples is not None:
+        return samples
+
+    packed = _from_pack(sound_path)
+    samples = packed[0].pcm(packed[1]) if packed else None
+    if samples is None:
+        _ensure_pcm(sound_path)
+        samples = _map_pcm(pcm_path_for(sound_path))
+
+    with _mapped_lock:
+        _mapped[sound_path] = samples
+        # dropping our reference is enough, clips still playing keep their mapping alive
+        while len(_mapped) > MAX_MAPPED_SOUNDS:
+            _mapped.popitem(last=False)
+    return samples
+
+
+def read_pcm(sound_path: str) -> np.ndarray:
+    """samples for a clip without mapping it (so no fd is held), for one-off bulk passes like exports"""
+    packed = _from_pack(sound_path)
+    samples = packed[0].pcm(packed[1]) if packed else None
+    if samples is not None:
+        return samples
+    _ensure_pcm(sound_path)
+    return np.fromfile(pcm_path_for(sound_path), dtype=np.int16)
+
+
+def is_mapped(sound_path: str) -> bool:
+    with _mapped_lock:
+        return sound_path in _mapped
+
+
+def prefault_pcm(sound_path: str) -> np.ndarray:
+    """map a clip and ask the kernel to pull it into the page cache now rather than on first play"""
+    samples = get_pcm(sound_path)
+    packed = _from_pack(sound_path)
+    if packed and packed[1].pcm_size:
+        packed[0].prefault(packed[1])
+        return samples
+    mapped = getattr(samples.base, 'obj', None)
+    if isinstance(mapped, mmap.mmap) and hasattr(mapped, 'madvise') and hasattr(mmap, 'MADV_WILLNEED'):
+        mapped.madvise(mmap.MADV_WILLNEED)
+    return samples
+
+
+def invalidate_pcm(sound_path: str, delete: bool = False):
+    """forget the mapping for a clip that got replaced, optionally deleting its .pcm too"""
+    with _mapped_lock:
+        _mapped.pop(sound_path, None)
+    if delete:
+        try:
+            pcm_path_for(sound_path).unlink(missing_ok=True)
+        except OSError as e:
+            print(f"⚠️ Could not remove {pcm_path_for(sound_path)}: {e}")
+
+
+def clear_pcm_cache(delete: bool = False) -> int:
+    """drop every mapping, and with delete=True wipe the .pcm library and unmount any packs too"""
+    with _mapped_lock:
+        _mapped.clear()
+        if delete:
+            _packed.clear()
+
+    deleted = 0
+    if delete and PCM_DIR.exists():
+        for pcm_file in PCM_DIR.glob("*.pcm"):
+            try:
+                pcm_file.unlink()
+                deleted += 1
+            except OSError as e:
+                print(f"Failed to delete {pcm_file}: {e}")
+    return deleted
+
+
+def pcm_duration(samples: np.ndarray) -> float:
+    return len(samples) / (SAMPLE_RATE * CHANNELS)
@@ -0,0 +1,185 @@
+# HonkBot | All Rights Reserved
+
+import os
+import signal
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # windows
+    resource = None
+
+# how many ffmpeg-ish children can run at once across every guild
+MAX_MEDIA_PROCESSES = int(os.getenv('MAX_MEDIA_PROCESSES', str(max(2, os.cpu_count() or 2))))
+# keep encoders from starving the voice threads
+CHILD_NICENESS = 10
+CHILD_MEMORY_LIMIT_MB = int(os.getenv('CHILD_MEMORY_LIMIT_MB', '512'))
+# anything we spawned that's older than this is considered hung and gets killed by the watchdog
+HUNG_PROCESS_SECONDS = 120
+
+MEDIA_PROCESS_NAMES = ('ffmpeg', 'ffprobe')
+
+
+def limit_process(pid: int):
+    """lower priority and cap address space for a child we spawned (best effort, posix only)"""
+    try:
+        os.setpriority(os.PRIO_PROCESS, pid, CHILD_NICENESS)
+    except (AttributeError, OSError):
+        pass
+    if resource is not None and hasattr(resource, 'prlimit'):
+        limit = CHILD_MEMORY_LIMIT_MB * 1024 * 1024
+        try:
+            resource.prlimit(pid, resource.RLIMIT_AS, (limit, limit))
+        except (OSError, ValueError):
+            pass
+
+
+class ProcessBudget:
+    """process-wide cap on media subprocesses, with queueing metrics and a hung-process reaper"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._slots = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        # pid -> (popen, started, label) for children spawned through run()
+        self._children = {}
+        self.active = 0
+        self.waiting = 0
+        self.peak_waiting = 0
+        self.started = 0
+        self.queued = 0
+        self.total_wait_seconds = 0.0
+        self.killed = 0
+
+    @contextmanager
+    def slot(self):
+        """hold one unit of the budget, e.g. around a yt-dlp job that spawns its own ffmpeg"""
+        with self._lock:
+            self.waiting += 1
+            self.peak_waiting = max(self.peak_waiting, self.waiting)
+        wait_started = time.monotonic()
+        contended = not self._slots.acquire(blocking=False)
+        if contended:
+            self._slots.acquire()
+        waited = time.monotonic() - wait_started
+        with self._lock:
+            self.waiting -= 1
+            self.active += 1
+            self.started += 1
+            self.queued += contended
+            self.total_wait_seconds += waited
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.active -= 1
+            self._slots.release()
+
+    def run(self, cmd: list, timeout: float, label: str = None, input: bytes = None) -> subprocess.CompletedProcess:
+        """subprocess.run(capture_output=True) inside the budget, with niceness + memory limits applied"""
+        with self.slot():
+            process = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE if input is not None else None,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
+            )
+            limit_process(process.pid)
+            with self._lock:
+                self._children[process.pid] = (process, time.monotonic(), label or cmd[0])
+            try:
+                stdout, stderr = process.communicate(input=input, timeout=timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.communicate()
+                raise
+            finally:
+                with self._lock:
+                    self._children.pop(process.pid, None)
+            return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+
+    def reap_hung(self, max_age: float = HUNG_PROCESS_SECONDS) -> int:
+        """kill any media child that ran too long, ours or not; returns kills"""
+        killed = 0
+        now = time.monotonic()
+        with self._lock:
+            tracked = list(self._children.items())
+
+        for pid, (process, started, label) in tracked:
+            if now - started > max_age and process.poll() is None:
+                print(f"🪓 Killing hung {label} (pid {pid}, {now - started:.0f}s old)")
+                process.kill()
+                killed += 1
+
+        # children someone else spawned (e.g. yt-dlp's ffmpeg) belong to the Popen that's going to
+        # wait on them, so kill hung ones but never waitpid: the owner collects the -9 and sees it
+        # failed. zombies have already exited and are just waiting on that same owner
+        tracked_pids = {pid for pid, _ in tracked}
+        children = _media_children()
+        for pid, name, state, age in children:
+            if pid in tracked_pids or state == 'Z':
+                continue
+            if age is not None and age > max_age:
+                print(f"🪓 Killing hung {name} we didn't start (pid {pid}, {age:.0f}s old)")
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                    killed += 1
+                except OSError:
+                    pass
+            else:
+                limit_process(pid)
+
+        with self._lock:
+            self.killed += killed
+        return killed
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "active": self.active,
+                "waiting": self.waiting,
+                "peak_waiting": self.peak_waiting,
+                "started": self.started,
+                "queued": self.queued,
+                "avg_wait_ms": round(1000 * self.total_wait_seconds / self.started, 1) if self.started else 0.0,
+                "killed": self.killed,
+            }
+
+
+def _media_children():
+    """(pid, name, state, age seconds) for ffmpeg/ffprobe processes whose parent is us; linux only"""
+    if not os.path.isdir('/proc'):
+        return []
+
+    my_pid = os.getpid()
+    try:
+        clock_ticks = os.sysconf('SC_CLK_TCK')
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, ValueError):
+        return []
+
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # the name is in parens and may contain spaces, so split around the last paren
+        name = stat[stat.index('(') + 1:stat.rindex(')')]
+        fields = stat[stat.rindex(')') + 2:].split()
+        if name not in MEDIA_PROCESS_NAMES or int(fields[1]) != my_pid:
+            continue
+        age = uptime - int(fields[19]) / clock_ticks
+        children.append((int(entry), name, fields[0], age))
+    return children
+
+
+media_processes = ProcessBudget(MAX_MEDIA_PROCESSES)
@@ -3,22 +3,306 @@
 
 import os
 import re
+import shutil
+import socket
+import tempfile
 import requests
 import json
 from pathlib import Path
 from dotenv import load_dotenv
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from process_budget import media_processes
 
 load_dotenv()
 
 OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY')
 FREESOUND_API_KEY = os.getenv('FREESOUND_API_KEY')
 
+# overridable so discovery can be pointed at local stand-ins (see discovery_bench.py)
+OPENROUTER_URL = os.getenv('OPENROUTER_URL', 'https://openrouter.ai/api/v1/chat/completions')
+FREESOUND_API_URL = os.getenv('FREESOUND_API_URL', 'https://freesound.org/apiv2').rstrip('/')
+
 SOUNDS_DIR = Path("sounds")
 SOUNDS_DIR.mkdir(exist_ok=True)
 
-executor = ThreadPoolExecutor(max_workers=3)
+# models to try, in starting order; the order adapts to observed latency + success rate
+OPENROUTER_MODELS = [m.strip() for m in os.getenv('OPENROUTER_MODELS', 'deepseek/deepseek-chat-v3.1:free').split(',') if m.strip()]
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '10'))
+# race the next model once the current one is slower than its usual p90
+HEDGE_PERCENTILE = 0.9
+HEDGE_MIN_DELAY = 0.5
+HEDGE_DEFAULT_DELAY = 3.0
+# hedge losers get cut off before they say how fast they are, so every this many requests the
+# least recently measured backup model is raced from the start and allowed to finish
+LLM_EXPLORE_EVERY = int(os.getenv('LLM_EXPLORE_EVERY', '10'))
+
+DISCOVERY_WORKERS = int(os.getenv('DISCOVERY_WORKERS', '3'))
+executor = ThreadPoolExecutor(max_workers=DISCOVERY_WORKERS)
+llm_executor = ThreadPoolExecutor(max_workers=DISCOVERY_WORKERS * max(2, len(OPENROUTER_MODELS)))
+
+# how many search results to download per discovery; the extras become /redo alternates
+PREFETCH_CANDIDATES = int(os.getenv('PREFETCH_CANDIDATES', '5'))
+# separate pool so discovery workers waiting on downloads can't starve each other
+prefetch_executor = ThreadPoolExecutor(max_workers=DISCOVERY_WORKERS * PREFETCH_CANDIDATES)
+
+# what a good candidate looks like
+IDEAL_DURATION = 1.2
+TARGET_MEAN_VOLUME_DB = -20.0
+SILENCE_THRESHOLD_DB = -45
+
+# yt-dlp + ffmpeg postprocessing is heavy, so cap how many run at once across all guilds
+YOUTUBE_WORKERS = int(os.getenv('YOUTUBE_WORKERS', '2'))
+youtube_executor = ThreadPoolExecutor(max_workers=YOUTUBE_WORKERS)
+
+# longest clip /set will keep, also its length when no end time is given
+MAX_CLIP_SECONDS = 8.0
+# seconds yt-dlp waits on a silent connection before giving up
+YOUTUBE_SOCKET_TIMEOUT = 30
+
+# sound path -> what discovery searched for, so the library can be searched by it
+SOUND_INFO_FILE = 'sound_info.json'
+sound_info = {}
+sound_info_lock = threading.Lock()
+
+
+class ModelStats:
+    """rolling latency + success record for one llm model"""
+
+    def __init__(self):
+        self.latencies = deque(maxlen=50)
+        self.successes = 0
+        self.failures = 0
+        self.last_recorded = 0.0
+
+    def record(self, latency: float, ok: bool):
+        self.last_recorded = time.monotonic()
+        if ok:
+            self.latencies.append(latency)
+            self.successes += 1
+        else:
+            self.failures += 1
+
+    def latency_percentile(self, pct: float) -> float:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(pct * len(ordered)))]
+
+    def hedge_delay(self) -> float:
+        """how long to give this model before racing the next one"""
+        observed = self.latency_percentile(HEDGE_PERCENTILE)
+        if observed is None:
+            return HEDGE_DEFAULT_DELAY
+        return min(max(observed, HEDGE_MIN_DELAY), LLM_TIMEOUT)
+
+    def score(self) -> float:
+        """expected seconds per useful answer, lower is better (smoothed so new models get a shot)"""
+        typical = self.latency_percentile(0.5) or HEDGE_DEFAULT_DELAY
+        success_rate = (self.successes + 1) / (self.successes + self.failures + 2)
+        return typical / success_rate
+
+
+model_stats = {model: ModelStats() for model in OPENROUTER_MODELS}
+model_stats_lock = threading.Lock()
+llm_requests = 0
+
+
+def ranked_models() -> list:
+    with model_stats_lock:
+        for model in OPENROUTER_MODELS:
+            model_stats.setdefault(model, ModelStats())
+        return sorted(OPENROUTER_MODELS, key=lambda m: model_stats[m].score())
+
+
+def exploration_model(models: list) -> str:
+    """every LLM_EXPLORE_EVERY requests, the backup model we've heard from least recently"""
+    global llm_requests
+    with model_stats_lock:
+        llm_requests += 1
+        if len(models) < 2 or LLM_EXPLORE_EVERY <= 0 or llm_requests % LLM_EXPLORE_EVERY:
+            return None
+        return min(models[1:], key=lambda m: model_stats[m].last_recorded)
+
+
+def parse_llm_json(content: str) -> dict:
+    content = content.strip()
+    if content.startswith('```'):
+        content = content.split('```')[1]
+        if content.startswith('json'):
+            content = content[4:]
+    return json.loads(content.strip())
+
+
+class ChatCall:
+    """one chat completion in flight; abort() cuts it off from another thread"""
+
+    def __init__(self, model: str):
+        self.model = model
+        # set by the worker when it actually starts, so time spent queued for a thread isn't latency
+        self.started = None
+        self.response = None
+        self.aborted = False
+
+    def abort(self):
+        # closing a response doesn't wake a read blocked on it, shutting the socket down does
+        self.aborted = True
+        connection = getattr(getattr(self.response, 'raw', None), 'connection', None)
+        sock = getattr(connection, 'sock', None)
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+def _post_chat(call: ChatCall, prompt: str, max_tokens: int) -> dict:
+    """one chat completion against one model, raises on anything that isn't usable json"""
+    call.started = time.monotonic()
+    model = call.model
+    if call.aborted:
+        raise RuntimeError(f"{model} request cut off before it started")
+
+    # streamed, so headers come straight back and an abort can drop the connection mid-answer
+    with requests.Session() as session:
+        response = session.post(
+            OPENROUTER_URL,
+            headers={
+                "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+                "Content-Type": "application/json"
+            },
+            json={
+                "model": model,
+                "messages": [
+                    {"role": "user", "content": prompt}
+                ],
+                "temperature": 0.3,
+                "max_tokens": max_tokens,
+                "stream": True
+            },
+            timeout=LLM_TIMEOUT,
+            stream=True
+        )
+        call.response = response
+        with response:
+            if call.aborted:
+                raise RuntimeError(f"{model} request cut off")
+            if response.status_code != 200:
+                raise RuntimeError(f"LLM API error from {model}: {response.status_code} - {response.text[:200]}")
+            content = _read_chat_stream(response, model)
+
+    result = parse_llm_json(content)
+    if not isinstance(result, dict) or not result.get('sound_query'):
+        raise ValueError(f"{model} returned json without a sound_query")
+    return result
+
+
+def _read_chat_stream(response: requests.Response, model: str) -> str:
+    """collect the answer out of an openrouter server-sent event stream"""
+    parts = []
+    for line in response.iter_lines():
+        # blank lines separate events, ': ...' lines are keep-alives while the model thinks
+        if not line.startswith(b'data: '):
+            continue
+        data = line[len(b'data: '):]
+        if data == b'[DONE]':
+            break
+        chunk = json.loads(data)
+        if chunk.get('error'):
+            error = chunk['error']
+            raise RuntimeError(f"LLM API error from {model}: {error.get('code')} - {str(error.get('message'))[:200]}")
+        choices = chunk.get('choices') or [{}]
+        parts.append(choices[0].get('delta', {}).get('content') or '')
+    return ''.join(parts)
+
+
+def query_llm_json(prompt: str, max_tokens: int = 200) -> dict:
+    """
+    ask the configured models for json, hedged: if the current model hasn't answered by its usual
+    p90 latency, the next model gets the same request too. first valid answer wins, the rest get cut off
+    (except an occasional exploration probe, see LLM_EXPLORE_EVERY)
+    """
+    if not OPENROUTER_API_KEY:
+        print("Warning: OPENROUTER_API_KEY not set")
+        return None
+
+    models = ranked_models()
+    probe = exploration_model(models)
+    if probe:
+        models.remove(probe)
+    pending = {}
+    next_model = 0
+    deadline = time.monotonic() + LLM_TIMEOUT
+
+    def submit(model):
+        call = ChatCall(model)
+        future = llm_executor.submit(_post_chat, call, prompt, max_tokens)
+        pending[future] = call
+        return future
+
+    def launch():
+        nonlocal next_model
+        model = models[next_model]
+        next_model += 1
+        submit(model)
+        return model
+
+    launch()
+    probe_future = submit(probe) if probe else None
+    try:
+        while pending:
+            now = time.monotonic()
+            if now >= deadline:
+                print(f"LLM request timed out across {next_model} model(s)")
+                return None
+
+            wait_for = deadline - now
+            if next_model < len(models):
+                # a request still queued for a thread counts as starting now: hedging it won't help
+                newest_started = max(call.started or now for call in pending.values())
+                with model_stats_lock:
+                    hedge_at = newest_started + model_stats[models[next_model - 1]].hedge_delay()
+                wait_for = min(wait_for, max(0.0, hedge_at - now))
+
+            done, _ = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            if not done:
+                if next_model < len(models):
+                    print(f"⏱️ LLM slow, hedging with {launch()}")
+                continue
+
+            for future in done:
+                call = pending.pop(future)
+                error = future.exception()
+                _record_call(call, error is None)
+                if error is None:
+                    return future.result()
+                print(f"Error querying LLM ({call.model}): {error}")
+
+            # a fast failure shouldn't have to wait out the hedge delay
+            if not pending and next_model < len(models):
+                launch()
+
+        return None
+    finally:
+        # losers get their connection shut down, which frees their worker thread right away and
+        # isn't counted against the model. the probe is left to finish so its latency gets measured
+        for future, call in pending.items():
+            if future is probe_future:
+                future.add_done_callback(lambda f, c=call: _record_call(c, f.exception() is None))
+                continue
+            future.cancel()
+            call.abort()
+
+
+def _record_call(call: ChatCall, ok: bool):
+    if call.started is None or call.aborted:
+        return
+    with model_stats_lock:
+        model_stats[call.model].record(time.monotonic() - call.started, ok)
 
 
 def query_llm_for_sound(emoji: str, emoji_name: str = None) -> dict:
@@ -65,41 +349,7 @@ Return only valid JSON:
 
 No markdown, no commentary, just JSON."""
 
-    try:
-        response = requests.post(
-            "https://openrouter.ai/api/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "deepseek/deepseek-chat-v3.1:free",
-                "messages": [
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.3,
-                "max_tokens": 200
-            },
-            timeout=10
-        )
-
-        if response.status_code == 200:
-            result = response.json()
-            content = result['choices'][0]['message']['content'].strip()
-
-            if content.startswith('```'):
-                content = content.split('```')[1]
-                if content.startswith('json'):
-                    content = content[4:]
-
-            return json.loads(content.strip())
-        else:
-            print(f"LLM API error: {response.status_code} - {response.text}")
-            return None
-
-    except Exception as e:
-        print(f"Error querying LLM: {e}")
-        return None
+    return query_llm_json(prompt, max_tokens=200)
 
 
 def search_freesound(query: str, duration_max: float = 3.0) -> list:
@@ -110,7 +360,7 @@ def search_freesound(query: str, duration_max: float = 3.0) -> list:
 
     try:
         response = requests.get(
-            "https://freesound.org/apiv2/search/text/",
+            f"{FREESOUND_API_URL}/search/text/",
             params={
                 "query": query,
                 "filter": f"duration:[0 TO {duration_max}] is_remix:false",
@@ -136,52 +386,236 @@ def search_freesound(query: str, duration_max: float = 3.0) -> list:
         return []
 
 
+def get_preview_url(sound_id: int) -> str:
+    """look up a sound's preview mp3 url"""
+    response = requests.get(
+        f"{FREESOUND_API_URL}/sounds/{sound_id}/",
+        headers={
+            "Authorization": f"Token {FREESOUND_API_KEY}"
+        },
+        timeout=10
+    )
+
+    if response.status_code != 200:
+        print(f"Failed to get sound info: {response.status_code}")
+        return None
+
+    return pick_preview_url(response.json())
+
+
+def pick_preview_url(sound_info: dict) -> str:
+    previews = sound_info.get('previews') or {}
+    return previews.get('preview-hq-mp3') or previews.get('preview-lq-mp3')
+
+
+def download_preview(preview_url: str, output_path: Path) -> bool:
+    audio_response = requests.get(preview_url, timeout=30)
+
+    if audio_response.status_code == 200:
+        with open(output_path, 'wb') as f:
+            f.write(audio_response.content)
+        return True
+    else:
+        print(f"Failed to download audio: {audio_response.status_code}")
+        return False
+
+
 def download_sound(sound_id: int, output_filename: str) -> bool:
     """grab a sound file from freesound given an id"""
     if not FREESOUND_API_KEY:
         return False
 
     try:
-        response = requests.get(
-            f"https://freesound.org/apiv2/sounds/{sound_id}/",
-            headers={
-                "Authorization": f"Token {FREESOUND_API_KEY}"
-            },
-            timeout=10
-        )
-
-        if response.status_code != 200:
-            print(f"Failed to get sound info: {response.status_code}")
-            return False
-
-        sound_info = response.json()
-
-        preview_url = sound_info.get('previews', {}).get('preview-hq-mp3')
-
-        if not preview_url:
-            preview_url = sound_info.get('previews', {}).get('preview-lq-mp3')
+        preview_url = get_preview_url(sound_id)
 
         if not preview_url:
             print("No preview URL available")
             return False
 
-        audio_response = requests.get(preview_url, timeout=30)
-
-        if audio_response.status_code == 200:
-            output_path = SOUNDS_DIR / output_filename
-            with open(output_path, 'wb') as f:
-                f.write(audio_response.content)
+        if download_preview(preview_url, SOUNDS_DIR / output_filename):
             print(f"✅ Downloaded: {output_filename}")
             return True
-        else:
-            print(f"Failed to download audio: {audio_response.status_code}")
-            return False
+        return False
 
     except Exception as e:
         print(f"Error downloading sound: {e}")
         return False
 
 
+def analyze_clip(path: Path) -> dict:
+    """cheap local signals for ranking candidates: duration, mean loudness and leading silence"""
+    stats = {"duration": None, "mean_volume": None, "leading_silence": 0.0}
+    try:
+        result = media_processes.run(
+            ['ffmpeg', '-hide_banner', '-nostats', '-i', str(path),
+             '-af', f'silencedetect=noise={SILENCE_THRESHOLD_DB}dB:d=0.05,volumedetect', '-f', 'null', '-'],
+            timeout=10,
+            label="ffmpeg analyze"
+        )
+    except Exception as e:
+        print(f"Error analyzing {path}: {e}")
+        return stats
+
+    log = result.stderr.decode(errors='replace')
+    duration = re.search(r'Duration: (\d+):(\d+):([\d.]+)', log)
+    if duration:
+        hours, minutes, seconds = duration.groups()
+        stats["duration"] = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+    mean_volume = re.search(r'mean_volume: (-?[\d.]+|-inf) dB', log)
+    if mean_volume and mean_volume.group(1) != '-inf':
+        stats["mean_volume"] = float(mean_volume.group(1))
+
+    # only silence that starts right at the top counts as leading
+    first_start = re.search(r'silence_start: (-?[\d.]+)', log)
+    first_end = re.search(r'silence_end: ([\d.]+)', log)
+    if first_start and float(first_start.group(1)) <= 0.01:
+        stats["leading_silence"] = float(first_end.group(1)) if first_end else (stats["duration"] or 0.0)
+
+    return stats
+
+
+def score_candidate(stats: dict, rank: int) -> float:
+    """higher is better; freesound's own rating order breaks ties"""
+    score = -rank * 0.1
+
+    duration = stats["duration"]
+    if duration is not None:
+        if duration < 0.2:
+            score -= 3.0
+        score -= abs(duration - IDEAL_DURATION) * 0.5
+
+    if stats["mean_volume"] is None:
+        # silent or undecodable, basically unusable
+        score -= 5.0
+    else:
+        score -= abs(stats["mean_volume"] - TARGET_MEAN_VOLUME_DB) / 10
+
+    score -= stats["leading_silence"] * 2.0
+    return score
+
+
+def fetch_candidate(result: dict, rank: int, staging_dir: Path):
+    """download one search result's preview and measure it, returns (score, path) or None"""
+    path = staging_dir / f"{result['id']}.mp3"
+    try:
+        preview_url = pick_preview_url(result) or get_preview_url(result['id'])
+        if not preview_url or not download_preview(preview_url, path):
+            return None
+    except Exception as e:
+        print(f"Error prefetching candidate {result.get('id')}: {e}")
+        return None
+
+    stats = analyze_clip(path)
+    if stats["duration"] is None:
+        stats["duration"] = result.get('duration')
+    return score_candidate(stats, rank), path
+
+
+def load_sound_info():
+    global sound_info
+    if os.path.exists(SOUND_INFO_FILE):
+        with open(SOUND_INFO_FILE, 'r', encoding='utf-8') as f:
+            sound_info = json.load(f)
+
+
+def _save_sound_info():
+    tmp_path = f"{SOUND_INFO_FILE}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(sound_info, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, SOUND_INFO_FILE)
+
+
+def record_sound_info(sound_path: str, sound_query: str, description: str = ''):
+    with sound_info_lock:
+        sound_info[sound_path] = {'sound_query': sound_query, 'description': description}
+        _save_sound_info()
+
+
+def forget_sound_info(sound_path=None):
+    """drop what we know about one sound, or about every sound if no path is given"""
+    with sound_info_lock:
+        if sound_path is None:
+            sound_info.clear()
+        elif sound_info.pop(sound_path, None) is None:
+            return
+        _save_sound_info()
+
+
+def sound_query_for(sound_path: str) -> str:
+    info = sound_info.get(sound_path)
+    return info.get('sound_query') if info else None
+
+
+def alternates_dir_for(sound_path) -> Path:
+    sound_path = Path(sound_path)
+    return sound_path.parent / "alternates" / sound_path.stem
+
+
+def clear_alternates(sound_path=None):
+    """drop the alternates pool for one sound, or every pool if no path is given"""
+    target = alternates_dir_for(sound_path) if sound_path else SOUNDS_DIR / "alternates"
+    if target.exists():
+        shutil.rmtree(target, ignore_errors=True)
+
+
+def alternates_left(sound_path) -> int:
+    pool = alternates_dir_for(sound_path)
+    return len(list(pool.glob("*.mp3"))) if pool.exists() else 0
+
+
+def promote_alternate(sound_path) -> str:
+    """swap the next-best prefetched candidate in as the sound, no network; None if the pool is empty"""
+    pool = alternates_dir_for(sound_path)
+    candidates = sorted(pool.glob("*.mp3")) if pool.exists() else []
+    if not candidates:
+        return None
+
+    os.replace(candidates[0], sound_path)
+    # bump the mtime so anything derived from the old file (like its .pcm) reads as stale
+    os.utime(sound_path)
+    return Path(sound_path).as_posix()
+
+
+def prefetch_candidates(results: list, output_path: Path) -> bool:
+    """download the top results in parallel, keep the best as the sound and the rest as alternates"""
+    pool = alternates_dir_for(output_path)
+    pool.parent.mkdir(parents=True, exist_ok=True)
+    # a staging dir of our own: two discoveries of the same sound (a custom emoji in two guilds)
+    # would otherwise wipe each other's downloads out from under them
+    staging_dir = Path(tempfile.mkdtemp(prefix=f".{pool.name}-", dir=pool.parent))
+
+    try:
+        candidates = results[:PREFETCH_CANDIDATES]
+        futures = [
+            prefetch_executor.submit(fetch_candidate, result, rank, staging_dir)
+            for rank, result in enumerate(candidates)
+        ]
+        fetched = [f.result() for f in futures]
+        ranked = sorted((c for c in fetched if c), key=lambda c: c[0], reverse=True)
+
+        if not ranked:
+            return False
+
+        os.replace(ranked[0][1], output_path)
+        print(f"✅ Downloaded: {output_path.name} (+{len(ranked) - 1} alternate(s))")
+
+        # prefix with the rank so the pool sorts best-first
+        for i, (_, path) in enumerate(ranked[1:]):
+            path.rename(staging_dir / f"{i:02d}_{path.name}")
+
+        # swap the finished pool in; whichever discovery finishes last owns the sound and its alternates
+        clear_alternates(output_path)
+        try:
+            os.replace(staging_dir, pool)
+        except OSError:
+            # another discovery swapped its pool in between, that one goes with the sound just as well
+            pass
+        return True
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+
 def _sync_find_and_download_sound(emoji: str, emoji_name: str = None) -> str:
     """sync version that handles finding + downloading"""
     print(f"\n🔍 Finding sound for emoji: {emoji}")
@@ -208,42 +642,16 @@ Current query: "{sound_query}"
 Respond only with a simpler 1–3 word phrase for sound search.
 Example: "angry cartoon face" → "angry voice", "fireworks celebration" → "fireworks explosion"
 Return ONLY a JSON object: {{"sound_query": "simpler phrase"}}"""
-        try:
-            simple_resp = requests.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "deepseek/deepseek-chat-v3.1:free",
-                    "messages": [
-                        {"role": "user", "content": simpler_prompt}
-                    ],
-                    "temperature": 0.3,
-                    "max_tokens": 100
-                },
-                timeout=10
-            )
-            if simple_resp.status_code == 200:
-                content = simple_resp.json()["choices"][0]["message"]["content"].strip()
-                if content.startswith("```"):
-                    content = content.split("```")[1]
-                    if content.startswith("json"):
-                        content = content[4:]
-                new_query_data = json.loads(content.strip())
-                new_query = new_query_data.get("sound_query")
-                if new_query and new_query != sound_query:
-                    print(f"🔁 Retrying with simplified query: '{new_query}'")
-                    sound_query = new_query
-                    results = search_freesound(sound_query)
-                else:
-                    break
-            else:
-                print(f"Simplify LLM API error: {simple_resp.status_code}")
-                break
-        except Exception as e:
-            print(f"Error simplifying query: {e}")
+        new_query_data = query_llm_json(simpler_prompt, max_tokens=100)
+        if not new_query_data:
+            print("Simplify LLM query failed")
+            break
+        new_query = new_query_data.get("sound_query")
+        if new_query and new_query != sound_query:
+            print(f"🔁 Retrying with simplified query: '{new_query}'")
+            sound_query = new_query
+            results = search_freesound(sound_query)
+        else:
             break
 
     if not results:
@@ -252,9 +660,6 @@ Return ONLY a JSON object: {{"sound_query": "simpler phrase"}}"""
 
     print(f"📦 Found {len(results)} sound(s)")
 
-    best_sound = results[0]
-    sound_id = best_sound['id']
-
     if emoji_name:
         safe_name = emoji_name.lower().replace(' ', '_').replace('-', '_')
         safe_name = re.sub(r'[^a-zA-Z0-9_]+', '', safe_name)
@@ -270,15 +675,20 @@ Return ONLY a JSON object: {{"sound_query": "simpler phrase"}}"""
     output_path = SOUNDS_DIR / output_filename
     if output_path.exists():
         print(f"ℹ️  Sound already exists: {output_filename}")
-        return f"sounds/{output_filename}"
+        if sound_query_for(output_path.as_posix()) is None:
+            record_sound_info(output_path.as_posix(), sound_query, description)
+        return output_path.as_posix()
 
-    # Download
-    success = download_sound(sound_id, output_filename)
+    # Download the top few at once, best one becomes the sound
+    success = prefetch_candidates(results, output_path)
 
     if success:
-        return f"sounds/{output_filename}"
-    else:
-        return None
+        record_sound_info(output_path.as_posix(), sound_query, description)
+        return output_path.as_posix()
+    if output_path.exists():
+        # a concurrent discovery of the same sound got there first, use theirs
+        return output_path.as_posix()
+    return None
 
 
 async def find_and_download_sound_for_emoji(emoji: str, emoji_name: str = None) -> str:
@@ -296,3 +706,71 @@ async def find_and_download_sound_for_emoji(emoji: str, emoji_name: str = None)
     except Exception as e:
         print(f"Error in async sound discovery: {e}")
         return None
+
+
+def download_youtube_clip(youtube_url: str, output_path: Path, start: float = 0.0, end: float = None) -> bool:
+    """download just the [start, end) segment of a youtube video as mp3, at most MAX_CLIP_SECONDS of it"""
+    import yt_dlp
+    from yt_dlp.utils import download_range_func
+
+    if end is None or end - start > MAX_CLIP_SECONDS:
+        end = start + MAX_CLIP_SECONDS
+
+    # write next to the target and swap it in at the end so a failed download can't clobber the old sound
+    # no dots in the stem: with_suffix() would eat a ".part-..." suffix and point tmp_path at output_path
+    tmp_stem = output_path.with_name(f"{output_path.stem}-part-{os.getpid()}-{threading.get_ident()}")
+    tmp_path = Path(f"{tmp_stem}.mp3")
+
+    ydl_opts = {
+        "format": "bestaudio/best",
+        "outtmpl": str(tmp_stem),  # yt_dlp adds .mp3 itself
+        "download_ranges": download_range_func(None, [(start, end)]),
+        "force_keyframes_at_cuts": True,
+        "postprocessors": [
+            {
+                "key": "FFmpegExtractAudio",
+                "preferredcodec": "mp3",
+                "preferredquality": "192",
+            }
+        ],
+        "quiet": True,
+        "no_warnings": True,
+        # a stalled connection errors out instead of holding a media slot forever
+        "socket_timeout": YOUTUBE_SOCKET_TIMEOUT,
+    }
+
+    print(f"🎥 Downloading YouTube audio {start:.1f}s-{end:.1f}s")
+    print(f"   URL: {youtube_url}")
+    print(f"   Output: {output_path}")
+
+    try:
+        # yt-dlp runs its own ffmpeg for the cut + mp3 conversion, so it counts against the budget
+        with media_processes.slot(), yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            result = ydl.download([youtube_url])
+            print(f"   yt_dlp result code: {result}")
+
+        if not tmp_path.exists():
+            print(f"❌ YouTube download failed, file not found at {tmp_path}")
+            return False
+
+        os.replace(tmp_path, output_path)
+        return True
+    finally:
+        if tmp_path.exists():
+            try:
+                tmp_path.unlink()
+            except Exception as e:
+                print(f"⚠️ Could not remove partial download {tmp_path}: {e}")
+
+
+async def download_youtube_clip_async(youtube_url: str, output_path: Path, start: float = 0.0, end: float = None) -> bool:
+    """run the youtube download on the capped worker pool"""
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(
+        youtube_executor,
+        download_youtube_clip,
+        youtube_url,
+        output_path,
+        start,
+        end
+    )
@@ -0,0 +1,116 @@
+# HonkBot | All Rights Reserved
+
+import re
+from bisect import bisect_left, insort
+from collections import namedtuple
+
+from emoji_keys import CUSTOM_EMOJI_PARTS
+
+SoundEntry = namedtuple('SoundEntry', 'key path name query')
+
+WORD = re.compile(r'\w+')
+
+
+def _sort_key(entry: SoundEntry) -> tuple:
+    # named custom emojis sort by name, everything else by the emoji itself
+    return ((entry.name or entry.key).lower(), entry.key)
+
+
+class SoundIndex:
+    """
+    sorted, searchable view of every emoji with a sound. updated one key at a time as sounds are
+    discovered / redone / cleared, so counts are O(1) and a page is a slice, not a scan of the cache
+    """
+
+    def __init__(self):
+        self._entries = {}
+        # sorted (sort key) tuples for paging
+        self._order = []
+        # sorted (word, key) pairs over custom names + sound queries for prefix search
+        self._words = []
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def _words_for(self, entry: SoundEntry) -> set:
+        return {w.lower() for w in WORD.findall(f"{entry.name or ''} {entry.query or ''}")}
+
+    def _entry(self, key: str, path: str, query: str = None) -> SoundEntry:
+        match = CUSTOM_EMOJI_PARTS.fullmatch(key)
+        return SoundEntry(key, path, match.group(1) if match else None, query)
+
+    def rebuild(self, items):
+        """replace everything from (key, path, query) triples, sorting once instead of per insert"""
+        self.clear()
+        for key, path, query in items:
+            self._entries[key] = self._entry(key, path, query)
+        entries = self._entries.values()
+        self._order = sorted(_sort_key(entry) for entry in entries)
+        self._words = sorted((word, entry.key) for entry in entries for word in self._words_for(entry))
+
+    def set(self, key: str, path: str, query: str = None):
+        """add or update one emoji's entry"""
+        entry = self._entry(key, path, query)
+        if self._entries.get(key) == entry:
+            return
+        self.remove(key)
+        self._entries[key] = entry
+        insort(self._order, _sort_key(entry))
+        for word in self._words_for(entry):
+            insort(self._words, (word, key))
+
+    def remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        sort_key = _sort_key(entry)
+        i = bisect_left(self._order, sort_key)
+        if i < len(self._order) and self._order[i] == sort_key:
+            del self._order[i]
+        for word in self._words_for(entry):
+            i = bisect_left(self._words, (word, key))
+            if i < len(self._words) and self._words[i] == (word, key):
+                del self._words[i]
+
+    def clear(self):
+        self._entries.clear()
+        self._order.clear()
+        self._words.clear()
+
+    def page(self, number: int, size: int) -> list:
+        """entries on a 0-based page"""
+        start = number * size
+        return [self._entries[key] for _, key in self._order[start:start + size]]
+
+    def page_count(self, size: int) -> int:
+        return max(1, -(-len(self._entries) // size))
+
+    def search(self, text: str, limit: int = 500) -> list:
+        """word prefix matches first (via bisect), then substring matches anywhere in names / queries"""
+        needle = text.strip().lower()
+        if not needle:
+            return []
+
+        hits = {}
+        i = bisect_left(self._words, (needle, ''))
+        while i < len(self._words) and len(hits) < limit:
+            word, key = self._words[i]
+            if not word.startswith(needle):
+                break
+            hits.setdefault(key, self._entries[key])
+            i += 1
+
+        if len(hits) < limit:
+            for _, key in self._order:
+                if key in hits:
+                    continue
+                entry = self._entries[key]
+                if needle == key or needle in (entry.name or '').lower() or needle in (entry.query or '').lower():
+                    hits[key] = entry
+                    if len(hits) >= limit:
+                        break
+
+        return list(hits.values())
@@ -0,0 +1,252 @@
+# HonkBot | All Rights Reserved
+"""
+single-file sound packs for bringing up a new node: every sound in emoji_cache.json, its
+encoded mp3 and (optionally) its pre-decoded pcm, behind a binary index. the bot mounts a
+pack in place with mmap, so nothing gets unpacked or transcoded before it can play.
+
+    python sound_pack.py export sounds.honkpack --pcm
+    python sound_pack.py info sounds.honkpack
+    python sound_pack.py unpack sounds.honkpack
+
+layout (little endian):
+    header   magic, version, flags, entry count, data offset
+    index    one fixed-size record per emoji key, followed by its utf-8 key / canonical key / path
+    data     mp3 and pcm blobs, each aligned so pcm can be viewed as int16 without copying
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+
+from emoji_keys import canonical_key
+from pcm_library import SAMPLE_RATE, CHANNELS, read_pcm, read_source, build_missing_pcm, pcm_duration
+
+PACK_MAGIC = b'HONKPACK'
+PACK_VERSION = 1
+FLAG_HAS_PCM = 0x1
+
+DEFAULT_PACK_FILE = 'sounds.honkpack'
+
+HEADER = struct.Struct('<8sHHIQ')
+# key / canonical / path byte lengths, reserved, duration, loudness dB, mp3 offset + size, pcm offset + size
+ENTRY = struct.Struct('<HHHHffQQQQ')
+
+# audio starts on a page boundary so reading the index never faults in any of it
+DATA_ALIGN = 4096
+BLOB_ALIGN = 64
+
+# what volumedetect reports for digital silence
+SILENCE_DB = -91.0
+
+PackEntry = namedtuple('PackEntry', 'key canonical path duration loudness mp3_offset mp3_size pcm_offset pcm_size')
+
+
+def _aligned(offset: int, alignment: int) -> int:
+    return (offset + alignment - 1) // alignment * alignment
+
+
+def loudness_db(samples: np.ndarray) -> float:
+    """rms level in dBFS, comparable to ffmpeg's mean_volume"""
+    if len(samples) == 0:
+        return SILENCE_DB
+    rms = float(np.sqrt(np.mean(np.square(samples, dtype=np.float64))))
+    return max(SILENCE_DB, 20 * float(np.log10(rms / 32768))) if rms else SILENCE_DB
+
+
+class SoundPack:
+    """a pack file mapped read-only; clips are served straight out of the mapping"""
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        self.mtime = os.path.getmtime(path)
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.flags, count, self.data_offset = HEADER.unpack_from(self._map, 0)
+        if magic != PACK_MAGIC:
+            raise ValueError(f"{path} is not a sound pack")
+        if version != PACK_VERSION:
+            raise ValueError(f"{path} is pack version {version}, expected {PACK_VERSION}")
+
+        # key -> entry, plus one entry per sound path since several keys can share a clip
+        self.entries = {}
+        self.by_path = {}
+        offset = HEADER.size
+        for _ in range(count):
+            key_len, canonical_len, path_len, _, *fields = ENTRY.unpack_from(self._map, offset)
+            offset += ENTRY.size
+            strings = []
+            for length in (key_len, canonical_len, path_len):
+                strings.append(self._map[offset:offset + length].decode('utf-8'))
+                offset += length
+            entry = PackEntry(*strings, *fields)
+            self.entries[entry.key] = entry
+            self.by_path.setdefault(entry.path, entry)
+
+    @property
+    def has_pcm(self) -> bool:
+        return bool(self.flags & FLAG_HAS_PCM)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def encoded(self, entry: PackEntry) -> bytes:
+        return self._map[entry.mp3_offset:entry.mp3_offset + entry.mp3_size]
+
+    def pcm(self, entry: PackEntry) -> np.ndarray:
+        """zero-copy int16 view of a clip's pcm, None if the pack was built without it"""
+        if not entry.pcm_size:
+            return None
+        return np.frombuffer(self._map, dtype=np.int16, count=entry.pcm_size // 2, offset=entry.pcm_offset)
+
+    def prefault(self, entry: PackEntry):
+        """ask the kernel to read one clip's pcm in ahead of its first play"""
+        if not entry.pcm_size or not hasattr(self._map, 'madvise') or not hasattr(mmap, 'MADV_WILLNEED'):
+            return
+        start = entry.pcm_offset - entry.pcm_offset % mmap.PAGESIZE
+        self._map.madvise(mmap.MADV_WILLNEED, start, entry.pcm_offset + entry.pcm_size - start)
+
+
+def write_pack(out_path: str, cache: dict, include_pcm: bool = False) -> int:
+    """pack every playable sound in an emoji -> path cache, returns how many keys went in"""
+    sounds = {}
+    for key, sound_path in cache.items():
+        if sound_path:
+            sounds.setdefault(sound_path, []).append(key)
+
+    # reserve room for every key's index record up front; sounds that fail get skipped and just
+    # leave padding, so the blobs can be streamed in one at a time and the index written last
+    strings = {
+        key: (key.encode('utf-8'), canonical_key(key).encode('utf-8'), sound_path.encode('utf-8'))
+        for sound_path, keys in sounds.items() for key in keys
+    }
+    index_size = HEADER.size + sum(ENTRY.size + sum(len(s) for s in parts) for parts in strings.values())
+    data_offset = _aligned(index_size, DATA_ALIGN)
+
+    # sound path -> (mp3 offset, mp3 size, pcm offset, pcm size, duration, loudness)
+    layout = {}
+    offset = data_offset
+
+    tmp_path = f"{out_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        for sound_path in sounds:
+            # one sound in memory at a time, and nothing mapped, so big libraries don't run out of fds
+            try:
+                encoded = read_source(sound_path)
+                samples = read_pcm(sound_path)
+            except Exception as e:
+                print(f"Skipping {sound_path}: {e}")
+                continue
+
+            mp3_offset = offset
+            f.seek(mp3_offset)
+            f.write(encoded)
+            offset = _aligned(offset + len(encoded), BLOB_ALIGN)
+
+            pcm_offset, pcm_size = 0, 0
+            if include_pcm:
+                pcm_offset, pcm_size = offset, samples.nbytes
+                f.seek(pcm_offset)
+                f.write(samples.tobytes())
+                offset = _aligned(offset + pcm_size, BLOB_ALIGN)
+
+            layout[sound_path] = (mp3_offset, len(encoded), pcm_offset, pcm_size,
+                                  pcm_duration(samples), loudness_db(samples))
+            del encoded, samples
+
+        rows = [(key, sound_path) for sound_path, keys in sounds.items() if sound_path in layout for key in keys]
+        f.seek(0)
+        f.write(HEADER.pack(PACK_MAGIC, PACK_VERSION, FLAG_HAS_PCM if include_pcm else 0, len(rows), data_offset))
+        for key, sound_path in rows:
+            mp3_offset, mp3_size, pcm_offset, pcm_size, duration, loudness = layout[sound_path]
+            f.write(ENTRY.pack(*(len(s) for s in strings[key]), 0, duration, loudness,
+                               mp3_offset, mp3_size, pcm_offset, pcm_size))
+            for s in strings[key]:
+                f.write(s)
+        f.truncate(offset)
+    os.replace(tmp_path, out_path)
+    return len(rows)
+
+
+def unpack(pack: SoundPack, cache: dict) -> int:
+    """write a pack's sounds out as plain files and merge its keys into cache, returns new keys"""
+    written = set()
+    added = 0
+    for entry in pack.entries.values():
+        if entry.path not in written and not os.path.exists(entry.path):
+            Path(entry.path).parent.mkdir(parents=True, exist_ok=True)
+            with open(entry.path, 'wb') as f:
+                f.write(pack.encoded(entry))
+            written.add(entry.path)
+        if entry.key not in cache:
+            cache[entry.key] = entry.path
+            added += 1
+    return added
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Export, inspect or unpack a HonkBot sound pack")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    export = sub.add_parser('export', help="pack every sound in the emoji cache into one file")
+    export.add_argument('pack', nargs='?', default=DEFAULT_PACK_FILE)
+    export.add_argument('--cache', default='emoji_cache.json', help="emoji cache to pack")
+    export.add_argument('--pcm', action='store_true', help="include pre-decoded pcm so nodes skip ffmpeg entirely")
+
+    info = sub.add_parser('info', help="print a pack's index")
+    info.add_argument('pack', nargs='?', default=DEFAULT_PACK_FILE)
+
+    unpack_cmd = sub.add_parser('unpack', help="write a pack's sounds to disk and merge it into the emoji cache")
+    unpack_cmd.add_argument('pack', nargs='?', default=DEFAULT_PACK_FILE)
+    unpack_cmd.add_argument('--cache', default='emoji_cache.json', help="emoji cache to merge into")
+    unpack_cmd.add_argument('--pcm', action='store_true', help="also build the .pcm library afterwards")
+    return parser.parse_args(argv)
+
+
+def load_cache(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.command == 'export':
+        count = write_pack(args.pack, load_cache(args.cache), include_pcm=args.pcm)
+        size_mb = os.path.getsize(args.pack) / (1024 * 1024)
+        print(f"📦 Packed {count} emoji key(s) into {args.pack} ({size_mb:.1f}MB)")
+        return 0
+
+    pack = SoundPack(args.pack)
+
+    if args.command == 'info':
+        print(f"{pack.path}: {len(pack)} key(s), {len(pack.by_path)} sound(s), "
+              f"pcm {'included' if pack.has_pcm else 'not included'} "
+              f"({SAMPLE_RATE}Hz, {CHANNELS}ch)")
+        for entry in pack.entries.values():
+            print(f"  {entry.key}  ({entry.canonical})  {entry.path}  "
+                  f"{entry.duration:.2f}s  {entry.loudness:.1f}dB")
+        return 0
+
+    cache = load_cache(args.cache)
+    added = unpack(pack, cache)
+    with open(args.cache, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2, ensure_ascii=False)
+    print(f"📦 Unpacked {len(pack.by_path)} sound(s), {added} new emoji key(s)")
+    if args.pcm:
+        built = build_missing_pcm(list(pack.by_path))
+        print(f"🔥 Built {built} pcm file(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
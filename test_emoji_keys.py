@@ -0,0 +1,48 @@
+# HonkBot | All Rights Reserved
+"""regression checks for pulling emojis out of messages and mapping them onto cache keys"""
+
+from bot import extract_emojis
+from emoji_keys import canonical_key, custom_emoji_id, lookup_keys
+
+THUMBS_UP = '\U0001F44D'
+MEDIUM = '\U0001F3FD'
+DARK = '\U0001F3FF'
+ZWJ = '\u200d'
+FAMILY = ZWJ.join(['\U0001F468', '\U0001F469', '\U0001F467'])
+RUNNER = '\U0001F3C3'
+WOMAN_RUNNING = f"{RUNNER}{ZWJ}\u2640\ufe0f"
+DUCK = '\U0001F986'
+ANIMATED = '<a:x:123456789012345678>'
+STATIC = '<:x:123456789012345678>'
+
+
+def test_skin_tones_stay_attached_and_share_a_key():
+    assert extract_emojis(f"{THUMBS_UP}{MEDIUM} and {THUMBS_UP}{DARK}") == [THUMBS_UP + MEDIUM, THUMBS_UP + DARK]
+    assert canonical_key(THUMBS_UP + MEDIUM) == canonical_key(THUMBS_UP + DARK) == THUMBS_UP
+    assert lookup_keys(THUMBS_UP + DARK) == (THUMBS_UP + DARK, THUMBS_UP)
+
+
+def test_zwj_family_is_one_emoji():
+    # not the family plus a stray copy of the man it starts with
+    assert extract_emojis(f"look {FAMILY}!") == [FAMILY]
+    assert canonical_key(FAMILY) == FAMILY
+    assert lookup_keys(FAMILY)[0] == FAMILY
+
+
+def test_gendered_variant_falls_back_to_the_base_emoji():
+    emojis = extract_emojis(WOMAN_RUNNING)
+    assert len(emojis) == 1
+    assert canonical_key(emojis[0]) == RUNNER
+    assert lookup_keys(emojis[0])[-1] == RUNNER
+
+
+def test_animated_and_static_custom_emoji_share_a_sound():
+    assert extract_emojis(f"{ANIMATED} {STATIC}") == [ANIMATED, STATIC]
+    assert canonical_key(ANIMATED) == canonical_key(STATIC) == STATIC
+    assert custom_emoji_id(ANIMATED) == custom_emoji_id(STATIC) == '123456789012345678'
+
+
+def test_adjacent_repeats_each_play():
+    assert extract_emojis(DUCK * 2) == [DUCK, DUCK]
+    assert extract_emojis(f"{THUMBS_UP}{MEDIUM}{THUMBS_UP}{MEDIUM}") == [THUMBS_UP + MEDIUM] * 2
+    assert extract_emojis(f"{ANIMATED}{ANIMATED}") == [ANIMATED, ANIMATED]
@@ -0,0 +1,83 @@
+# HonkBot | All Rights Reserved
+
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+# lives next to emoji_cache.json
+USAGE_STATS_FILE = 'usage_stats.json'
+
+# a play from this long ago counts half as much as one right now
+HALF_LIFE_SECONDS = 3 * 24 * 3600
+
+
+def decayed(score: float, last_played: float, now: float) -> float:
+    return score * 0.5 ** ((now - last_played) / HALF_LIFE_SECONDS)
+
+
+class UsageTracker:
+    """
+    per-emoji and per-guild play counts with a time-decayed score. record() only bumps an
+    in-memory counter; flush() folds those into the totals and writes them out, off the hot path
+    """
+
+    def __init__(self, path: str = USAGE_STATS_FILE):
+        self.path = path
+        self._pending = Counter()
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # key -> [count, score, last played]
+        self.emojis = {}
+        # guild id (as str, it's json) -> key -> [count, score, last played]
+        self.guilds = {}
+
+    def load(self):
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.emojis = data.get('emojis', {})
+            self.guilds = data.get('guilds', {})
+        print(f"Loaded play stats for {len(self.emojis)} sound(s)")
+
+    def record(self, guild_id: int, key: str):
+        """count one play; cheap enough to call for every clip"""
+        with self._pending_lock:
+            self._pending[(guild_id, key)] += 1
+
+    def flush(self) -> int:
+        """fold pending plays into the decayed totals and save; returns how many plays were flushed"""
+        with self._flush_lock:
+            with self._pending_lock:
+                pending, self._pending = self._pending, Counter()
+            if not pending:
+                return 0
+
+            now = time.time()
+            for (guild_id, key), plays in pending.items():
+                for table in (self.emojis, self.guilds.setdefault(str(guild_id), {})):
+                    count, score, last = table.get(key, (0, 0.0, now))
+                    table[key] = [count + plays, decayed(score, last, now) + plays, now]
+
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'emojis': self.emojis, 'guilds': self.guilds}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            return sum(pending.values())
+
+    def hot_set(self, k: int, guild_id: int = None) -> list:
+        """top-k (key, decayed score, total plays), hottest first"""
+        with self._flush_lock:
+            table = self.emojis if guild_id is None else self.guilds.get(str(guild_id), {})
+            rows = list(table.items())
+        now = time.time()
+        ranked = sorted(
+            ((key, decayed(score, last, now), count) for key, (count, score, last) in rows),
+            key=lambda row: row[1],
+            reverse=True
+        )
+        return ranked[:k]
+
+
+usage = UsageTracker()